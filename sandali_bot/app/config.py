@@ -4,6 +4,106 @@ from dotenv import load_dotenv
 load_dotenv()
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
+BOT_API_URL = os.getenv("BOT_API_URL")  # Defaults to api.telegram.org
 COINGECKO_API_KEY = os.getenv("COINGECKO_API_KEY")
 ALPHA_VANTAGE_API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY")
 METALS_API_KEY = os.getenv("METALS_API_KEY")
+
+# Database
+DB_PATH = os.getenv("DB_PATH", "sandali.db")
+DB_READ_CONNECTIONS = int(os.getenv("DB_READ_CONNECTIONS", "4"))
+
+# Opt-in write pipeline: relaxed sync plus grouped commits for queued writes (WAL is always on)
+DB_WRITE_BEHIND = os.getenv("DB_WRITE_BEHIND", "0") == "1"
+DB_FLUSH_INTERVAL_MS = int(os.getenv("DB_FLUSH_INTERVAL_MS", "25"))
+DB_FLUSH_MAX_ROWS = int(os.getenv("DB_FLUSH_MAX_ROWS", "200"))
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "FULL")  # NORMAL skips the fsync per group commit
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+
+# Chart rendering worker processes
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", "2"))
+CHART_MAX_PENDING = int(os.getenv("CHART_MAX_PENDING", "8"))
+CHART_TIMEOUT = float(os.getenv("CHART_TIMEOUT", "15"))
+
+# Chart output preset: "telegram" matches Telegram's photo resize (max 1280px side),
+# "print" keeps the old 300 dpi output
+CHART_PRESET = os.getenv("CHART_PRESET", "telegram")
+CHART_DPI = os.getenv("CHART_DPI")  # Overrides the preset's dpi when set
+CHART_CACHE_SIZE = int(os.getenv("CHART_CACHE_SIZE", "256"))
+
+# Registered users resolved once per update
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "600"))  # Seconds; bounds staleness across replicas
+# Seconds an unknown user stays cached; short so a registration on another replica is seen quickly
+USER_NEGATIVE_TTL = int(os.getenv("USER_NEGATIVE_TTL", "5"))
+
+# Per-user throttling: each user refills THROTTLE_RATE tokens per minute (burst THROTTLE_BURST);
+# handlers spend their "cost" flag. Heavy handlers also share global concurrency caps.
+THROTTLE_RATE = float(os.getenv("THROTTLE_RATE", "30"))
+THROTTLE_BURST = float(os.getenv("THROTTLE_BURST", "30"))
+THROTTLE_MAX_USERS = int(os.getenv("THROTTLE_MAX_USERS", "50000"))
+THROTTLE_QUEUE_TIMEOUT = float(os.getenv("THROTTLE_QUEUE_TIMEOUT", "3"))  # Seconds to wait for a heavy slot
+HEAVY_CONCURRENCY = {
+    "charts": int(os.getenv("THROTTLE_CHARTS_CONCURRENCY", "4")),
+    "quotes": int(os.getenv("THROTTLE_QUOTES_CONCURRENCY", "8")),
+    "files": int(os.getenv("THROTTLE_FILES_CONCURRENCY", "2")),
+}
+
+# Per-user category lists and their keyboards
+CATEGORY_CACHE_SIZE = int(os.getenv("CATEGORY_CACHE_SIZE", "10000"))
+
+# Price lookups
+ALPHA_VANTAGE_URL = os.getenv("ALPHA_VANTAGE_URL", "https://www.alphavantage.co/query")
+PRICE_CONCURRENCY = int(os.getenv("PRICE_CONCURRENCY", "5"))
+PRICE_BUDGET = float(os.getenv("PRICE_BUDGET", "4"))  # Seconds a portfolio view waits for quotes
+PRICE_MAX_AGE = int(os.getenv("PRICE_MAX_AGE", "21600"))  # Oldest stale quote served while refreshing
+
+# Background price refresh and upstream quota (Alpha Vantage free tier by default)
+PRICE_REFRESH_TICK = int(os.getenv("PRICE_REFRESH_TICK", "30"))
+QUOTES_PER_MINUTE = int(os.getenv("QUOTES_PER_MINUTE", "5"))
+QUOTES_PER_DAY = int(os.getenv("QUOTES_PER_DAY", "25"))
+# Share of each provider's quota the refresher may spend; the rest is kept for user lookups
+PRICE_REFRESH_QUOTA_SHARE = float(os.getenv("PRICE_REFRESH_QUOTA_SHARE", "0.5"))
+
+# Price providers: "live" routes each asset class to its provider, "fake" reads FAKE_PRICES_FILE
+PRICE_PROVIDER = os.getenv("PRICE_PROVIDER", "live")
+FAKE_PRICES_FILE = os.getenv(
+    "FAKE_PRICES_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools", "fake_prices.json")
+)
+COINGECKO_URL = os.getenv("COINGECKO_URL", "https://api.coingecko.com/api/v3/simple/price")
+COINGECKO_CALLS_PER_MINUTE = int(os.getenv("COINGECKO_CALLS_PER_MINUTE", "30"))
+METALS_API_URL = os.getenv("METALS_API_URL", "https://metals-api.com/api/latest")
+METALS_CALLS_PER_DAY = int(os.getenv("METALS_CALLS_PER_DAY", "48"))
+
+# Failing providers: circuit breaker and negative caching
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "3"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "60"))
+NEGATIVE_CACHE_TTL = int(os.getenv("NEGATIVE_CACHE_TTL", "60"))
+
+# Expense import/export
+IMPORT_CHUNK_ROWS = int(os.getenv("IMPORT_CHUNK_ROWS", "1000"))  # Rows per insert transaction
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(20 * 1024 * 1024)))  # Bot API download limit
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "1000"))
+
+# FSM storage: "sqlite" keeps conversations in the database, "memory" in this process only.
+# Set FSM_CACHE_SIZE=0 when several bot processes share one database.
+FSM_STORAGE = os.getenv("FSM_STORAGE", "sqlite")
+FSM_CACHE_SIZE = int(os.getenv("FSM_CACHE_SIZE", "10000"))
+FSM_TTL = int(os.getenv("FSM_TTL", "86400"))  # Seconds before an abandoned conversation is dropped
+
+# Update delivery: "polling" or "webhook" (Telegram POSTs updates to WEBHOOK_URL + WEBHOOK_PATH)
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")  # Public base URL, e.g. https://bot.example.com
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))  # Telegram-side limit per replica
+WEBHOOK_CONCURRENCY = int(os.getenv("WEBHOOK_CONCURRENCY", "32"))  # Updates handled at once
+WEBHOOK_DRAIN_TIMEOUT = float(os.getenv("WEBHOOK_DRAIN_TIMEOUT", "25"))  # Seconds to finish in-flight updates on shutdown
+
+# Metrics: Prometheus text format on http://METRICS_HOST:METRICS_PORT/metrics (disabled when no port)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+SLOW_OP_MS = float(os.getenv("SLOW_OP_MS", "0"))  # Log handlers, queries and upstream calls slower than this; 0 disables
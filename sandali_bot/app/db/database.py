@@ -1,4 +1,52 @@
+import asyncio
 import sqlite3
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import aiosqlite
+
+from config import (
+    DB_PATH, DB_READ_CONNECTIONS, DB_WRITE_BEHIND, DB_FLUSH_INTERVAL_MS,
+    DB_FLUSH_MAX_ROWS, DB_SYNCHRONOUS, DB_CACHE_SIZE_KB
+)
+from db.migrations import migrate
+from utils.metrics import instrument_methods
+
+
+DAY_SECONDS = 24 * 60 * 60
+
+
+def utc_day(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).date().isoformat()
+
+
+def _base36(n):
+    # Matches int(s, 36), including the sign of pre-1970 timestamps
+    if n < 0:
+        return "-" + _base36(-n)
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    out = []
+    while True:
+        n, r = divmod(n, 36)
+        out.append(digits[r])
+        if not n:
+            return "".join(reversed(out))
+
+
+def encode_cursor(ts, expense_id):
+    # Compact, opaque position in a user's expense history (fits in callback data)
+    return f"{_base36(ts)}.{_base36(expense_id)}"
+
+
+def decode_cursor(cursor):
+    # Returns (ts, id), or None for a missing or malformed cursor
+    try:
+        ts, expense_id = cursor.split(".")
+        return int(ts, 36), int(expense_id, 36)
+    except (AttributeError, ValueError):
+        return None
+
 
 class Database:
     category_emojis = {
@@ -11,138 +59,456 @@ class Database:
         "Health": "💊"
     }
 
-    def __init__(self, db_name='sandali.db'):
-        self.conn = sqlite3.connect(db_name)
-        self.cursor = self.conn.cursor()
-        self.create_tables()
-
-    def create_tables(self):
-        # Users table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                telegram_id INTEGER PRIMARY KEY,
-                phone TEXT,
-                username TEXT,
-                first_name TEXT,
-                last_name TEXT
-            )
-        ''')
-        # Expenses table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS expenses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                category TEXT,
-                amount REAL,
-                description TEXT,
-                date TEXT,
-                FOREIGN KEY (user_id) REFERENCES users (telegram_id)
-            )
-        ''')
-        # Categories table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS categories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                name TEXT UNIQUE,
-                FOREIGN KEY (user_id) REFERENCES users (telegram_id)
-            )
-        ''')
-        # Investments table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS investments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                asset TEXT,
-                quantity REAL,
-                purchase_price REAL,
-                purchase_date TEXT,
-                FOREIGN KEY (user_id) REFERENCES users (telegram_id)
-            )
-        ''')
-        self.conn.commit()
+    def __init__(self, db_name=DB_PATH, read_connections=DB_READ_CONNECTIONS,
+                 write_behind=DB_WRITE_BEHIND, flush_interval_ms=DB_FLUSH_INTERVAL_MS,
+                 flush_max_rows=DB_FLUSH_MAX_ROWS):
+        self.db_name = db_name
+        self.read_connections = read_connections
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval_ms / 1000
+        self.flush_max_rows = flush_max_rows
+        # One dedicated writer, serialized by a lock, plus a small pool of
+        # read-only connections so slow reads never wait behind writes.
+        self.writer = None
+        self._write_lock = asyncio.Lock()
+        self._readers = []
+        self._read_pool = asyncio.Queue()
+        # Write-behind mode: queued (op, future) pairs flushed in grouped transactions
+        self._write_queue = asyncio.Queue()
+        self._flusher = None
+
+    async def connect(self):
+        self.writer = await aiosqlite.connect(self.db_name)
+        # WAL lets the read pool keep reading while the writer commits;
+        # in rollback-journal mode a long read would hold up every write
+        await self.writer.execute('PRAGMA journal_mode=WAL')
+        if self.write_behind:
+            await self.writer.execute(f'PRAGMA synchronous={DB_SYNCHRONOUS}')
+            await self.writer.execute(f'PRAGMA cache_size=-{DB_CACHE_SIZE_KB}')
+        await migrate(self.writer)
+        read_uri = f"{Path(self.db_name).resolve().as_uri()}?mode=ro"
+        for _ in range(self.read_connections):
+            conn = await aiosqlite.connect(read_uri, uri=True)
+            await conn.execute(f'PRAGMA cache_size=-{DB_CACHE_SIZE_KB}')
+            self._readers.append(conn)
+            self._read_pool.put_nowait(conn)
+        if self.write_behind:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    @asynccontextmanager
+    async def _reader(self):
+        conn = await self._read_pool.get()
+        try:
+            yield conn
+        finally:
+            self._read_pool.put_nowait(conn)
+
+    async def _fetchone(self, sql, params=()):
+        async with self._reader() as conn:
+            async with conn.execute(sql, params) as cursor:
+                return await cursor.fetchone()
+
+    async def _fetchall(self, sql, params=()):
+        async with self._reader() as conn:
+            async with conn.execute(sql, params) as cursor:
+                return await cursor.fetchall()
+
+    async def _write(self, op):
+        # Runs op(conn) on the writer connection as one transaction and
+        # returns once it is committed
+        if self._flusher is not None:
+            future = asyncio.get_running_loop().create_future()
+            self._write_queue.put_nowait((op, future))
+            return await future
+        async with self._write_lock:
+            try:
+                result = await op(self.writer)
+                await self.writer.commit()
+            except Exception:
+                await self.writer.rollback()
+                raise
+        return result
+
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._write_queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.flush_max_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._write_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                # Keep the flusher alive; otherwise every later write waits forever
+                print(f"Error flushing writes: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+
+    async def _flush(self, batch):
+        # One transaction per batch; a savepoint per op so a failing write
+        # (e.g. a duplicate category) only fails its own caller.
+        outcomes = []
+        async with self._write_lock:
+            conn = self.writer
+            try:
+                await conn.execute('BEGIN')
+                for op, future in batch:
+                    await conn.execute('SAVEPOINT write_op')
+                    try:
+                        result = await op(conn)
+                    except Exception as e:
+                        await conn.execute('ROLLBACK TO write_op')
+                        outcomes.append((future, None, e))
+                    else:
+                        outcomes.append((future, result, None))
+                    await conn.execute('RELEASE write_op')
+                await conn.commit()
+            except Exception as e:
+                try:
+                    await conn.rollback()
+                except Exception as rollback_error:
+                    print(f"Error rolling back write batch: {rollback_error}")
+                outcomes = [(future, None, e) for _, future in batch]
+
+        for future, result, error in outcomes:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    async def _execute_write(self, sql, params=()):
+        async def op(conn):
+            cursor = await conn.execute(sql, params)
+            return cursor.rowcount
+        return await self._write(op)
 
-    def add_user(self, telegram_id, phone, username, first_name, last_name):
-        self.cursor.execute('''
-            INSERT OR REPLACE INTO users (telegram_id, phone, username, first_name, last_name)
+    async def add_user(self, telegram_id, phone, username, first_name, last_name):
+        # Upsert rather than REPLACE so re-registering keeps settings such as timezone
+        await self._execute_write('''
+            INSERT INTO users (telegram_id, phone, username, first_name, last_name)
             VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (telegram_id) DO UPDATE SET
+                phone = excluded.phone,
+                username = excluded.username,
+                first_name = excluded.first_name,
+                last_name = excluded.last_name
         ''', (telegram_id, phone, username, first_name, last_name))
-        self.conn.commit()
 
-    def get_user(self, telegram_id):
-        self.cursor.execute('SELECT * FROM users WHERE telegram_id = ?', (telegram_id,))
-        return self.cursor.fetchone()
+    async def get_user(self, telegram_id):
+        return await self._fetchone('SELECT * FROM users WHERE telegram_id = ?', (telegram_id,))
 
-    def add_expense(self, user_id, category, amount, description, date):
-        self.cursor.execute('''
-            INSERT INTO expenses (user_id, category, amount, description, date)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (user_id, category, amount, description, date))
-        self.conn.commit()
+    async def set_timezone(self, telegram_id, timezone_name):
+        rowcount = await self._execute_write('''
+            UPDATE users SET timezone = ? WHERE telegram_id = ?
+        ''', (timezone_name, telegram_id))
+        return rowcount > 0
+
+    async def add_expense(self, user_id, category, amount, description, date):
+        # date is a timezone-aware datetime; ts (UTC epoch seconds) is what queries use
+        ts = int(date.timestamp())
+
+        async def op(conn):
+            await conn.execute('''
+                INSERT INTO expenses (user_id, category, amount, description, date, ts)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (user_id, category, amount, description, date.isoformat(), ts))
+            await conn.execute('''
+                INSERT INTO daily_spend (user_id, day, category, total, count)
+                VALUES (?, ?, ?, ?, 1)
+                ON CONFLICT (user_id, day, category) DO UPDATE SET
+                    total = total + excluded.total,
+                    count = count + 1
+            ''', (user_id, utc_day(ts), category, amount))
+        await self._write(op)
+
+    async def add_expenses(self, user_id, rows):
+        # Bulk insert for imports: rows are (category, amount, description, date_iso, ts).
+        # One transaction, with the daily rollup updated once per (day, category).
+        days = {}
+        for category, amount, _, _, ts in rows:
+            key = (utc_day(ts), category)
+            total, count = days.get(key, (0, 0))
+            days[key] = (total + amount, count + 1)
 
-    def get_expenses(self, user_id, limit=10, offset=0):
-        self.cursor.execute('''
-            SELECT id, category, amount, description, date
+        async def op(conn):
+            await conn.executemany('''
+                INSERT INTO expenses (user_id, category, amount, description, date, ts)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(user_id, *row) for row in rows])
+            await conn.executemany('''
+                INSERT INTO daily_spend (user_id, day, category, total, count)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (user_id, day, category) DO UPDATE SET
+                    total = total + excluded.total,
+                    count = count + excluded.count
+            ''', [(user_id, day, category, total, count) for (day, category), (total, count) in days.items()])
+        await self._write(op)
+
+    async def iter_expenses(self, user_id, chunk_rows=1000):
+        # Oldest first, fetched chunk_rows at a time so exports never hold the whole history
+        async with self._reader() as conn:
+            async with conn.execute('''
+                SELECT category, amount, description, ts
+                FROM expenses
+                WHERE user_id = ?
+                AND amount IS NOT NULL
+                ORDER BY ts, id
+            ''', (user_id,)) as cursor:
+                while True:
+                    rows = await cursor.fetchmany(chunk_rows)
+                    if not rows:
+                        return
+                    for row in rows:
+                        yield row
+
+    async def get_expenses(self, user_id, limit=10, before=None):
+        # Newest first. before is the (ts, id) of the last row already shown;
+        # seeking past it keeps every page as cheap as the first.
+        if before is None:
+            return await self._fetchall('''
+                SELECT id, category, amount, description, ts
+                FROM expenses
+                WHERE user_id = ?
+                AND amount IS NOT NULL
+                ORDER BY ts DESC, id DESC
+                LIMIT ?
+            ''', (user_id, limit))
+        return await self._fetchall('''
+            SELECT id, category, amount, description, ts
             FROM expenses
             WHERE user_id = ?
+            AND (ts, id) < (?, ?)
             AND amount IS NOT NULL
-            ORDER BY date DESC
-            LIMIT ? OFFSET ?
-        ''', (user_id, limit, offset))
-        return self.cursor.fetchall()
-
-    def delete_expense(self, user_id, expense_id):
-        self.cursor.execute('''
-            DELETE FROM expenses
-            WHERE user_id = ? AND id = ?
-        ''', (user_id, expense_id))
-        self.conn.commit()
-        return self.cursor.rowcount > 0
-
-    def add_category(self, user_id, name):
+            ORDER BY ts DESC, id DESC
+            LIMIT ?
+        ''', (user_id, before[0], before[1], limit))
+
+    async def delete_expense(self, user_id, expense_id):
+        async def op(conn):
+            async with conn.execute('''
+                SELECT category, amount, ts FROM expenses
+                WHERE user_id = ? AND id = ?
+            ''', (user_id, expense_id)) as cursor:
+                row = await cursor.fetchone()
+            if row is None:
+                return False
+            category, amount, ts = row
+            await conn.execute('''
+                DELETE FROM expenses
+                WHERE user_id = ? AND id = ?
+            ''', (user_id, expense_id))
+            if amount is not None:
+                day = utc_day(ts)
+                await conn.execute('''
+                    UPDATE daily_spend SET total = total - ?, count = count - 1
+                    WHERE user_id = ? AND day = ? AND category = ?
+                ''', (amount, user_id, day, category))
+                await conn.execute('''
+                    DELETE FROM daily_spend
+                    WHERE user_id = ? AND day = ? AND category = ? AND count <= 0
+                ''', (user_id, day, category))
+            return True
+        return await self._write(op)
+
+    async def add_category(self, user_id, name):
         try:
-            self.cursor.execute('''
+            await self._execute_write('''
                 INSERT INTO categories (user_id, name) VALUES (?, ?)
             ''', (user_id, name))
-            self.conn.commit()
             return True
         except sqlite3.IntegrityError:
             return False  # Category already exists
 
-    def get_categories(self, user_id):
-        self.cursor.execute('''
+    async def get_categories(self, user_id):
+        rows = await self._fetchall('''
             SELECT name FROM categories WHERE user_id = ?
         ''', (user_id,))
-        return [row[0] for row in self.cursor.fetchall()]
+        return [row[0] for row in rows]
 
-    def get_spending_stats(self, user_id, start_date, end_date):
-        self.cursor.execute('''
-            SELECT category, SUM(amount) as total
-            FROM expenses
-            WHERE user_id = ? AND date BETWEEN ? AND ?
+    async def get_spending_stats(self, user_id, start_ts, end_ts):
+        # Totals per category for start_ts <= ts <= end_ts (UTC epoch seconds).
+        # Whole UTC days come from the daily_spend rollup; only the partial
+        # days at either end are summed from raw expenses.
+        first_full_day = -(-start_ts // DAY_SECONDS) * DAY_SECONDS
+        last_day = end_ts // DAY_SECONDS * DAY_SECONDS
+        if first_full_day >= last_day:
+            return await self._fetchall('''
+                SELECT category, SUM(amount) as total
+                FROM expenses
+                WHERE user_id = ? AND ts BETWEEN ? AND ?
+                GROUP BY category
+                ORDER BY total DESC
+            ''', (user_id, start_ts, end_ts))
+
+        return await self._fetchall('''
+            SELECT category, SUM(total) as total
+            FROM (
+                SELECT category, total FROM daily_spend
+                WHERE user_id = ? AND day >= ? AND day < ?
+                UNION ALL
+                SELECT category, amount FROM expenses
+                WHERE user_id = ? AND ts >= ? AND ts < ?
+                UNION ALL
+                SELECT category, amount FROM expenses
+                WHERE user_id = ? AND ts >= ? AND ts <= ?
+            )
             GROUP BY category
+            HAVING total IS NOT NULL
             ORDER BY total DESC
-        ''', (user_id, start_date, end_date))
-        return self.cursor.fetchall()
+        ''', (user_id, utc_day(first_full_day), utc_day(last_day),
+              user_id, start_ts, first_full_day,
+              user_id, last_day, end_ts))
 
-    def add_investment(self, user_id, asset, quantity, purchase_price, purchase_date):
-        self.cursor.execute('''
-            INSERT INTO investments (user_id, asset, quantity, purchase_price, purchase_date)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (user_id, asset, quantity, purchase_price, purchase_date))
-        self.conn.commit()
+    async def rebuild_daily_spend(self):
+        # Recompute the rollup from the expenses table
+        async def op(conn):
+            await conn.execute('DELETE FROM daily_spend')
+            await conn.execute('''
+                INSERT INTO daily_spend (user_id, day, category, total, count)
+                SELECT user_id, date(ts, 'unixepoch'), category, SUM(amount), COUNT(*)
+                FROM expenses
+                WHERE amount IS NOT NULL
+                GROUP BY user_id, date(ts, 'unixepoch'), category
+            ''')
+        await self._write(op)
+
+    async def verify_daily_spend(self):
+        # Rollup rows that disagree with the expenses they summarize:
+        # (user_id, day, category, expected_total, expected_count, rollup_total, rollup_count)
+        return await self._fetchall('''
+            SELECT e.user_id, e.day, e.category, e.total, e.count, d.total, d.count
+            FROM (
+                SELECT user_id, date(ts, 'unixepoch') AS day, category, SUM(amount) AS total, COUNT(*) AS count
+                FROM expenses
+                WHERE amount IS NOT NULL
+                GROUP BY user_id, date(ts, 'unixepoch'), category
+            ) e
+            LEFT JOIN daily_spend d
+                ON d.user_id = e.user_id AND d.day = e.day AND d.category = e.category
+            WHERE d.count IS NULL OR d.count != e.count OR ABS(d.total - e.total) > 0.005
+            UNION ALL
+            SELECT d.user_id, d.day, d.category, NULL, NULL, d.total, d.count
+            FROM daily_spend d
+            WHERE NOT EXISTS (
+                SELECT 1 FROM expenses e
+                WHERE e.user_id = d.user_id AND date(e.ts, 'unixepoch') = d.day
+                AND e.category = d.category AND e.amount IS NOT NULL
+            )
+        ''')
 
-    def get_investments(self, user_id):
-        self.cursor.execute('''
+    async def add_investment(self, user_id, asset, quantity, purchase_price, purchase_date):
+        async def op(conn):
+            await conn.execute('''
+                INSERT INTO investments (user_id, asset, quantity, purchase_price, purchase_date)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (user_id, asset, quantity, purchase_price, purchase_date))
+            # Keep the position in step with the purchase, in the same transaction
+            await conn.execute('''
+                INSERT INTO positions (user_id, asset, total_quantity, total_cost, last_purchase_date)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (user_id, asset) DO UPDATE SET
+                    total_quantity = total_quantity + excluded.total_quantity,
+                    total_cost = total_cost + excluded.total_cost,
+                    last_purchase_date = MAX(last_purchase_date, excluded.last_purchase_date)
+            ''', (user_id, asset, quantity, quantity * purchase_price, purchase_date))
+        await self._write(op)
+
+    async def get_investments(self, user_id):
+        return await self._fetchall('''
             SELECT asset, quantity, purchase_price
             FROM investments
             WHERE user_id = ?
             ORDER BY purchase_date DESC
         ''', (user_id,))
-        return self.cursor.fetchall()
 
-    def close(self):
-        self.conn.close()
+    async def get_positions(self, user_id):
+        return await self._fetchall('''
+            SELECT asset, total_quantity, total_cost
+            FROM positions
+            WHERE user_id = ?
+            ORDER BY last_purchase_date DESC
+        ''', (user_id,))
+
+    async def rebuild_positions(self):
+        # Recompute every position from the investments ledger
+        async def op(conn):
+            await conn.execute('DELETE FROM positions')
+            await conn.execute('''
+                INSERT INTO positions (user_id, asset, total_quantity, total_cost, last_purchase_date)
+                SELECT user_id, asset, SUM(quantity), SUM(quantity * purchase_price), MAX(purchase_date)
+                FROM investments
+                GROUP BY user_id, asset
+            ''')
+        await self._write(op)
+
+    async def get_held_assets(self):
+        # Assets anyone holds, most widely held first
+        return await self._fetchall('''
+            SELECT asset, COUNT(DISTINCT user_id) AS holders
+            FROM investments
+            GROUP BY asset
+            ORDER BY holders DESC
+        ''')
+
+    async def get_prices(self):
+        return await self._fetchall('SELECT asset, price, fetched_at, source FROM prices')
+
+    async def save_prices(self, rows):
+        # rows: (asset, price, fetched_at, source)
+        async def op(conn):
+            await conn.executemany('''
+                INSERT OR REPLACE INTO prices (asset, price, fetched_at, source)
+                VALUES (?, ?, ?, ?)
+            ''', rows)
+        await self._write(op)
+
+    async def get_fsm_record(self, key):
+        return await self._fetchone('''
+            SELECT state, data, updated_at FROM fsm_state WHERE key = ?
+        ''', (key,))
+
+    async def save_fsm_record(self, key, state, data, updated_at):
+        await self._execute_write('''
+            INSERT INTO fsm_state (key, state, data, updated_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET
+                state = excluded.state,
+                data = excluded.data,
+                updated_at = excluded.updated_at
+        ''', (key, state, data, updated_at))
+
+    async def delete_fsm_record(self, key):
+        await self._execute_write('DELETE FROM fsm_state WHERE key = ?', (key,))
+
+    async def purge_fsm_records(self, older_than):
+        return await self._execute_write('DELETE FROM fsm_state WHERE updated_at < ?', (older_than,))
+
+    async def close(self):
+        if self._flusher is not None:
+            await self._write_queue.join()
+            self._flusher.cancel()
+            self._flusher = None
+        for conn in self._readers:
+            await conn.close()
+        self._readers.clear()
+        if self.writer is not None:
+            await self.writer.close()
+            self.writer = None
+
+# Every public query is timed into sandali_db_query_seconds
+instrument_methods(Database)
 
-# Global database instance
-db = Database()
\ No newline at end of file
+# Global database instance, connected on bot startup
+db = Database()
@@ -0,0 +1,93 @@
+import json
+import time
+from collections import OrderedDict
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage
+
+from config import FSM_CACHE_SIZE, FSM_TTL
+from db.database import db
+from utils.metrics import register_cache
+
+PURGE_INTERVAL = 600  # Seconds between sweeps of expired rows
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    aiogram FSM storage kept in the fsm_state table, so conversations
+    survive restarts and can be shared between bot processes. Recently
+    used keys are held in an LRU cache of cache_size entries; state left
+    untouched for ttl seconds counts as abandoned and reads as empty.
+    """
+
+    def __init__(self, cache_size=FSM_CACHE_SIZE, ttl=FSM_TTL):
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self._cache = OrderedDict()  # key: (state, data, updated_at)
+        self._last_purge = time.time()
+        self.hits = 0
+        self.misses = 0
+        register_cache("fsm", lambda: (self.hits, self.misses))
+
+    @staticmethod
+    def _key(key):
+        return f"{key.bot_id}:{key.chat_id}:{key.user_id}:{key.thread_id or ''}:{key.destiny}"
+
+    def _remember(self, key, record):
+        if not self.cache_size:
+            return
+        self._cache[key] = record
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _load(self, key):
+        record = self._cache.get(key)
+        if record is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+        else:
+            self.misses += 1
+            row = await db.get_fsm_record(key)
+            record = (row[0], json.loads(row[1]), row[2]) if row else (None, {}, 0)
+            self._remember(key, record)
+        if record[2] and time.time() - record[2] > self.ttl:
+            return None, {}
+        return record[0], record[1]
+
+    async def _save(self, key, state, data):
+        now = time.time()
+        if state is None and not data:
+            await db.delete_fsm_record(key)
+            self._remember(key, (None, {}, 0))
+        else:
+            await db.save_fsm_record(key, state, json.dumps(data), now)
+            self._remember(key, (state, data, now))
+        if now - self._last_purge > PURGE_INTERVAL:
+            self._last_purge = now
+            await db.purge_fsm_records(now - self.ttl)
+            # Expired cache entries already read as empty; drop them too
+            for cached_key in [k for k, record in self._cache.items() if record[2] and now - record[2] > self.ttl]:
+                del self._cache[cached_key]
+
+    async def set_state(self, key, state=None):
+        key = self._key(key)
+        _, data = await self._load(key)
+        await self._save(key, state.state if isinstance(state, State) else state, data)
+
+    async def get_state(self, key):
+        state, _ = await self._load(self._key(key))
+        return state
+
+    async def set_data(self, key, data):
+        key = self._key(key)
+        state, _ = await self._load(key)
+        await self._save(key, state, dict(data))
+
+    async def get_data(self, key):
+        _, data = await self._load(self._key(key))
+        return dict(data)
+
+    async def close(self):
+        # The connection belongs to db, which main closes itself
+        self._cache.clear()
@@ -0,0 +1,46 @@
+import argparse
+import asyncio
+
+from db.database import Database
+
+
+async def rebuild_positions(db):
+    await db.rebuild_positions()
+    print("Rebuilt positions from investments")
+
+
+async def backfill_daily_spend(db):
+    await db.rebuild_daily_spend()
+    print("Rebuilt daily_spend from expenses")
+
+
+async def verify_daily_spend(db):
+    mismatches = await db.verify_daily_spend()
+    for user_id, day, category, expected_total, expected_count, total, count in mismatches:
+        print(f"user {user_id} {day} {category}: expenses {expected_total} ({expected_count}), "
+              f"rollup {total} ({count})")
+    print(f"{len(mismatches)} mismatched daily_spend rows")
+    if mismatches:
+        raise SystemExit(1)
+
+
+COMMANDS = {
+    "rebuild-positions": rebuild_positions,
+    "backfill-daily-spend": backfill_daily_spend,
+    "verify-daily-spend": verify_daily_spend,
+}
+
+
+async def main(command):
+    db = Database()
+    await db.connect()
+    try:
+        await COMMANDS[command](db)
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintenance tasks for the Sandali database")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    asyncio.run(main(parser.parse_args().command))
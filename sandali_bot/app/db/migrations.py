@@ -0,0 +1,170 @@
+import asyncio
+from datetime import datetime, timezone
+
+import aiosqlite
+
+# Ordered schema migrations as (version, description, sql).
+# Each step runs once in its own transaction and is recorded in schema_version.
+# Append new steps at the end; never edit a step that has already shipped.
+MIGRATIONS = [
+    (1, "initial schema", '''
+        CREATE TABLE IF NOT EXISTS users (
+            telegram_id INTEGER PRIMARY KEY,
+            phone TEXT,
+            username TEXT,
+            first_name TEXT,
+            last_name TEXT
+        );
+        CREATE TABLE IF NOT EXISTS expenses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            category TEXT,
+            amount REAL,
+            description TEXT,
+            date TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (telegram_id)
+        );
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            name TEXT UNIQUE,
+            FOREIGN KEY (user_id) REFERENCES users (telegram_id)
+        );
+        CREATE TABLE IF NOT EXISTS investments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            asset TEXT,
+            quantity REAL,
+            purchase_price REAL,
+            purchase_date TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (telegram_id)
+        );
+    '''),
+    (2, "per-user covering indexes", '''
+        -- get_expenses and get_spending_stats
+        CREATE INDEX IF NOT EXISTS idx_expenses_user_date
+            ON expenses (user_id, date, category, amount);
+        -- get_investments
+        CREATE INDEX IF NOT EXISTS idx_investments_user_date
+            ON investments (user_id, purchase_date, asset, quantity, purchase_price);
+    '''),
+    (3, "scope category names per user", '''
+        CREATE TABLE categories_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            name TEXT,
+            UNIQUE (user_id, name),
+            FOREIGN KEY (user_id) REFERENCES users (telegram_id)
+        );
+        INSERT INTO categories_new (id, user_id, name)
+            SELECT id, user_id, name FROM categories;
+        DROP TABLE categories;
+        ALTER TABLE categories_new RENAME TO categories;
+    '''),
+    (4, "persistent price cache", '''
+        CREATE TABLE prices (
+            asset TEXT PRIMARY KEY,
+            price REAL,
+            fetched_at REAL,
+            source TEXT
+        );
+    '''),
+    (5, "positions maintained alongside investments", '''
+        CREATE TABLE positions (
+            user_id INTEGER,
+            asset TEXT,
+            total_quantity REAL,
+            total_cost REAL,
+            last_purchase_date TEXT,
+            PRIMARY KEY (user_id, asset)
+        );
+        INSERT INTO positions (user_id, asset, total_quantity, total_cost, last_purchase_date)
+            SELECT user_id, asset, SUM(quantity), SUM(quantity * purchase_price), MAX(purchase_date)
+            FROM investments
+            GROUP BY user_id, asset;
+    '''),
+    (6, "daily spending rollup", '''
+        CREATE TABLE daily_spend (
+            user_id INTEGER,
+            day TEXT,
+            category TEXT,
+            total REAL,
+            count INTEGER,
+            PRIMARY KEY (user_id, day, category)
+        );
+        INSERT INTO daily_spend (user_id, day, category, total, count)
+            SELECT user_id, substr(date, 1, 10), category, SUM(amount), COUNT(*)
+            FROM expenses
+            WHERE amount IS NOT NULL
+            GROUP BY user_id, substr(date, 1, 10), category;
+    '''),
+    (7, "epoch-second expense timestamps and user timezones", '''
+        ALTER TABLE expenses ADD COLUMN ts INTEGER;
+        UPDATE expenses SET ts = CAST(strftime('%s', date) AS INTEGER);
+        DROP INDEX IF EXISTS idx_expenses_user_date;
+        CREATE INDEX idx_expenses_user_ts ON expenses (user_id, ts, category, amount);
+        ALTER TABLE users ADD COLUMN timezone TEXT NOT NULL DEFAULT 'UTC';
+        -- Rollup days are UTC days of ts from now on
+        DELETE FROM daily_spend;
+        INSERT INTO daily_spend (user_id, day, category, total, count)
+            SELECT user_id, date(ts, 'unixepoch'), category, SUM(amount), COUNT(*)
+            FROM expenses
+            WHERE amount IS NOT NULL
+            GROUP BY user_id, date(ts, 'unixepoch'), category;
+    '''),
+    (8, "persistent FSM storage", '''
+        CREATE TABLE IF NOT EXISTS fsm_state (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_fsm_state_updated ON fsm_state (updated_at);
+    '''),
+]
+
+
+async def get_schema_version(conn):
+    async with conn.execute('SELECT MAX(version) FROM schema_version') as cursor:
+        row = await cursor.fetchone()
+    return row[0] or 0
+
+
+async def migrate(conn):
+    await conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TEXT
+        )
+    ''')
+    await conn.commit()
+
+    current = await get_schema_version(conn)
+    for version, description, sql in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            await conn.executescript(f"BEGIN;\n{sql}")
+            await conn.execute('''
+                INSERT INTO schema_version (version, description, applied_at)
+                VALUES (?, ?, ?)
+            ''', (version, description, datetime.now(timezone.utc).isoformat()))
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
+        print(f"Applied migration {version}: {description}")
+    return await get_schema_version(conn)
+
+
+async def main():
+    from config import DB_PATH
+
+    async with aiosqlite.connect(DB_PATH) as conn:
+        version = await migrate(conn)
+    print(f"{DB_PATH} is at schema version {version}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,19 +1,21 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from states.expense_states import AddExpense
-from keyboards.inline import get_category_keyboard, get_amount_keyboard
+from keyboards.inline import get_amount_keyboard, get_expense_page_keyboard
 from keyboards.reply import main_menu, cancel_keyboard, delete_keyboard
-from db.database import db
+from db.database import db, encode_cursor, decode_cursor
+from utils.chart_cache import chart_cache
+from utils.category_cache import category_cache
 
 router = Router()
 
 @router.message(F.text == "➕ Add Expense")
 async def add_expense_cmd(message: Message, state: FSMContext):
-    user_id = message.from_user.id
-    user_categories = db.get_categories(user_id)
-    await state.update_data(user_id=user_id)
-    await message.answer("Please select a category for your expense:", reply_markup=get_category_keyboard(user_categories))
+    keyboard = await category_cache.get_keyboard(message.from_user.id)
+    await message.answer("Please select a category for your expense:", reply_markup=keyboard)
     await state.set_state(AddExpense.selecting_category)
 
 @router.callback_query(F.data == "add_category")
@@ -27,7 +29,8 @@ async def add_custom_category(message: Message, state: FSMContext):
     user_id = message.from_user.id
     category_name = message.text.strip()
     if category_name != "❌ Cancel":
-        if db.add_category(user_id, category_name):
+        if await db.add_category(user_id, category_name):
+            category_cache.invalidate(user_id)
             await message.answer(f"✅ Category '{category_name}' added!", reply_markup=main_menu())
             await state.update_data(category=category_name)
             await message.answer("💵 Please select an amount:", reply_markup=get_amount_keyboard())
@@ -63,9 +66,8 @@ async def prompt_custom_amount(callback_query: CallbackQuery, state: FSMContext)
 
 @router.callback_query(F.data == "back_to_category")
 async def back_to_main(callback_query: CallbackQuery, state: FSMContext):
-    user_id = callback_query.from_user.id
-    user_categories = db.get_categories(user_id)
-    await callback_query.message.edit_text("Please select a category for your expense:", reply_markup=get_category_keyboard(user_categories))
+    keyboard = await category_cache.get_keyboard(callback_query.from_user.id)
+    await callback_query.message.edit_text("Please select a category for your expense:", reply_markup=keyboard)
     await state.set_state(AddExpense.selecting_category)
 
 @router.message(F.text == "❌ Cancel")
@@ -90,29 +92,50 @@ async def enter_description(message: Message, state: FSMContext):
     amount = data['amount']
     description = message.text if message.text.lower() != 'skip' else None
     user_id = message.from_user.id
-    date = message.date.isoformat()
-    db.add_expense(user_id, category, amount, description, date)
+    date = message.date
+    await db.add_expense(user_id, category, amount, description, date)
+    chart_cache.invalidate_user(user_id)
     await message.answer("✅ Expense added successfully!", reply_markup=main_menu())
     await state.clear()
 
-@router.message(F.text == "📋 View Expenses")
-async def view_expenses(message: Message):
-    user_id = message.from_user.id
-    expenses = db.get_expenses(user_id, limit=10)
-    if not expenses:
+EXPENSES_PAGE_SIZE = 10
+
+
+async def render_expense_page(user_id, tz, before=None):
+    # Returns (text, keyboard) for one page, or (None, None) when it is empty
+    rows = await db.get_expenses(user_id, limit=EXPENSES_PAGE_SIZE + 1, before=before)
+    if not rows:
+        return None, None
+    expenses = rows[:EXPENSES_PAGE_SIZE]
+    next_cursor = encode_cursor(expenses[-1][4], expenses[-1][0]) if len(rows) > EXPENSES_PAGE_SIZE else None
+    lines = []
+    for expense_id, category, amount, description, ts in expenses:
+        description = f" - {description}" if description else ""
+        when = datetime.fromtimestamp(ts, tz).strftime("%Y-%m-%d %H:%M:%S")
+        emoji = db.category_emojis.get(category, "📌")
+        lines.append(f"•ID: {expense_id}\n {emoji} ${amount:.2f} ({category}){description}\n  {when}\n")
+    return "\n".join(lines), get_expense_page_keyboard(next_cursor, first_page=before is None)
+
+
+@router.message(F.text == "📋 View Expenses", flags={"cost": 2})
+async def view_expenses(message: Message, user):
+    text, keyboard = await render_expense_page(message.from_user.id, ZoneInfo(user["timezone"]))
+    if text is None:
         await message.answer("📭 No expenses found.", reply_markup=main_menu())
         return
-    response = "📋 Recent Expenses:\n\n"
-    for expense in expenses:
-        expense_id = expense[0]
-        category = expense[1]
-        amount = f"${expense[2]:.2f}"
-        description = f" - {expense[3]}" if expense[3] else ""
-        date = expense[4].split("T")[0]
-        time = expense[4].split("T")[1].split(".")[0]
-        emoji = db.category_emojis.get(category, "📌")
-        response += f"•ID: {expense_id}\n {emoji} {amount} ({category}){description}\n  {date} {time}\n\n"
-    await message.answer(response, reply_markup=delete_keyboard())
+    await message.answer("📋 Recent Expenses:", reply_markup=delete_keyboard())
+    await message.answer(text, reply_markup=keyboard)
+
+
+@router.callback_query(F.data.startswith("expenses_page:"), flags={"cost": 2})
+async def expenses_page(callback_query: CallbackQuery, user):
+    before = decode_cursor(callback_query.data.split(":", 1)[1])
+    text, keyboard = await render_expense_page(callback_query.from_user.id, ZoneInfo(user["timezone"]), before)
+    if text is None:
+        await callback_query.answer("No older expenses.")
+        return
+    await callback_query.message.edit_text(text, reply_markup=keyboard)
+    await callback_query.answer()
 
 
 @router.message(F.text == "🗑️ Delete Expense")
@@ -125,7 +148,8 @@ async def delete_expenses(message: Message, state: FSMContext):
     try:
         expense_id = int(message.text)
         user_id = message.from_user.id
-        if db.delete_expense(user_id, expense_id):
+        if await db.delete_expense(user_id, expense_id):
+            chart_cache.invalidate_user(user_id)
             await message.answer(f"✅ Expense ID {expense_id} deleted.", reply_markup=main_menu())
         else:
             await message.answer(f"❌ No expense found with ID {expense_id}.", reply_markup=main_menu())
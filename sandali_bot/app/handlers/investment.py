@@ -5,8 +5,7 @@ from keyboards.inline import get_investment_category_keyboard, get_investment_as
 from keyboards.reply import main_menu
 from states.investment_states import InvestmentStates
 from db.database import db
-from utils.api_clients import get_asset_price
-from collections import defaultdict
+from utils.prices import get_asset_prices
 
 router = Router()
 
@@ -26,7 +25,7 @@ async def choose_cat(cb: CallbackQuery, state: FSMContext):
     mapping = {"stocks": STOCKS, "crypto": CRYPTO, "commodities": COMMODITY}
     items = mapping.get(cat, [])
     await cb.message.edit_text(f"Select {cat.capitalize()} asset:",
-                               reply_markup=get_investment_asset_keyboard(cat, items))
+                               reply_markup=get_investment_asset_keyboard(cat, tuple(items)))
     await state.set_state(InvestmentStates.selecting_asset)
     await cb.answer()
 
@@ -61,7 +60,7 @@ async def enter_price(msg: Message, state: FSMContext):
         price = float(msg.text)
         data = await state.get_data()
         asset, qty = data["asset"], data["quantity"]
-        db.add_investment(msg.from_user.id, asset, qty, price, msg.date.isoformat())
+        await db.add_investment(msg.from_user.id, asset, qty, price, msg.date.isoformat())
         await msg.answer(
             f"✅ Recorded: <b>{qty}</b> of <b>{asset}</b> @ <b>${price:.2f}</b>\n",
             reply_markup=main_menu(),
@@ -71,27 +70,21 @@ async def enter_price(msg: Message, state: FSMContext):
     except ValueError:
         await msg.answer("❌ Invalid price. Please enter price again:")
 
-@router.message(F.text == "💼 View Portfolio")
+@router.message(F.text == "💼 View Portfolio", flags={"cost": 5, "heavy": "quotes"})
 async def view_portfolio(message: Message):
     user_id = message.from_user.id
-    raw = db.get_investments(user_id)
-    if not raw:
+    positions = await db.get_positions(user_id)
+    if not positions:
         await message.answer("Your portfolio is empty.", reply_markup=main_menu())
         return
 
-    from collections import defaultdict
-
-    portfolio = defaultdict(list)
-    for asset, quantity, price in raw:
-        portfolio[asset].append((quantity, price))
+    prices = await get_asset_prices(asset for asset, _, _ in positions)
 
     response = "📈 <b>Your Portfolio</b>:\n\n"
-    for asset, entries in portfolio.items():
-        total_quantity = sum(q for q, _ in entries)
-        total_cost = sum(q * p for q, p in entries)
+    for asset, total_quantity, total_cost in positions:
         avg_price = total_cost / total_quantity if total_quantity else 0
 
-        current_price = get_asset_price(asset)
+        current_price = prices.get(asset)
         if current_price:
             current_value = total_quantity * current_price
             initial_value = total_cost
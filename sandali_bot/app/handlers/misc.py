@@ -0,0 +1,28 @@
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from aiogram import Router
+from aiogram.types import Message
+from aiogram.filters import Command, CommandObject
+from utils.user_cache import user_cache
+from keyboards.reply import main_menu
+
+router = Router()
+
+@router.message(Command("timezone"))
+async def timezone_cmd(message: Message, command: CommandObject, user):
+    user_id = message.from_user.id
+    if not command.args:
+        await message.answer(
+            f"🕒 Your timezone is {user['timezone']}.\nSet it with /timezone Area/City, e.g. /timezone Europe/Berlin",
+            reply_markup=main_menu()
+        )
+        return
+    name = command.args.strip()
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        await message.answer(f"❌ Unknown timezone '{name}'. Use a name like Europe/Berlin.", reply_markup=main_menu())
+        return
+    if await user_cache.set_timezone(user_id, name):
+        await message.answer(f"✅ Timezone set to {name}.", reply_markup=main_menu())
+    else:
+        await message.answer("❌ Please register with /start first.", reply_markup=main_menu())
@@ -1,14 +1,13 @@
 from aiogram import Router, F
 from aiogram.types import Message, Contact
 from aiogram.filters import CommandStart, Command
-from db.database import db
+from utils.user_cache import user_cache
 from keyboards.reply import get_phone_keyboard, main_menu
 
 router = Router()
 
 @router.message((CommandStart()))
-async def start_cmd(message: Message):
-    user = db.get_user(message.from_user.id)
+async def start_cmd(message: Message, user):
     if user:
         await message.answer("Welcome back!", reply_markup=main_menu())
     else:
@@ -20,7 +19,7 @@ async def start_cmd(message: Message):
 @router.message(F.contact)
 async def process_contact(message: Message):
     contact: Contact = message.contact
-    db.add_user(
+    await user_cache.add_user(
         telegram_id=message.from_user.id,
         phone=contact.phone_number,
         username=message.from_user.username,
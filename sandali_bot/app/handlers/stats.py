@@ -1,16 +1,37 @@
+import asyncio
 from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery, FSInputFile
+from aiogram.types import Message, CallbackQuery, BufferedInputFile
 from aiogram.fsm.context import FSMContext
 from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 from db.database import db
 from keyboards.inline import get_stats_period_keyboard
 from keyboards.reply import main_menu
 from utils.charts import generate_bar_chart, generate_pie_chart
-import os
+from utils.render_service import renderer, RendererBusy
+from utils.chart_cache import chart_cache
 
 router = Router()
 
 
+async def get_chart_photo(user_id, chart_type, render_func, stats, title):
+    # Returns (cache key, photo), where photo is a cached file_id when available
+    key = chart_cache.make_key(title, stats, chart_type)
+    entry = chart_cache.get(user_id, key)
+    if entry is None:
+        png = await renderer.render(render_func, stats, title)
+        entry = chart_cache.put(user_id, key, png)
+    if entry.file_id:
+        return key, entry.file_id
+    return key, BufferedInputFile(entry.png, filename=f"{chart_type}_chart.png")
+
+
+async def send_chart(message, key, photo, caption):
+    sent = await message.answer_photo(photo, caption=caption)
+    if not isinstance(photo, str):
+        chart_cache.set_file_id(key, sent.photo[-1].file_id)
+
+
 @router.message(F.text == "📊 Statistics")
 async def stats_cmd(message: Message):
     await message.answer(
@@ -19,27 +40,30 @@ async def stats_cmd(message: Message):
     )
 
 
-@router.callback_query(F.data.startswith("stats_period:"))
-async def show_stats(callback_query: CallbackQuery):
+@router.callback_query(F.data.startswith("stats_period:"), flags={"cost": 5, "heavy": "charts"})
+async def show_stats(callback_query: CallbackQuery, user):
     period = callback_query.data.split(":")[1]
     user_id = callback_query.from_user.id
-    end_date = datetime.now()
+    # Periods start at local midnight in the user's timezone
+    end_date = datetime.now(ZoneInfo(user["timezone"]))
+    today = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
 
     if period == "day":
-        start_date = end_date - timedelta(days=1)
+        days = 1
         title = "Daily Spending"
     elif period == "week":
-        start_date = end_date - timedelta(days=7)
+        days = 7
         title = "Weekly Spending"
     elif period == "month":
-        start_date = end_date - timedelta(days=30)
+        days = 30
         title = "Monthly Spending"
     else:  # 3 months
-        start_date = end_date - timedelta(days=90)
+        days = 90
         title = "Last 3 Months Spending"
+    start_date = today - timedelta(days=days - 1)
 
     # Fetch stats from database
-    stats = db.get_spending_stats(user_id, start_date.isoformat(), end_date.isoformat())
+    stats = await db.get_spending_stats(user_id, int(start_date.timestamp()), int(end_date.timestamp()))
     if not stats:
         await callback_query.message.answer(
             f"📭 No expenses found for {title.lower()}.",
@@ -59,24 +83,19 @@ async def show_stats(callback_query: CallbackQuery):
 
     # Generate and send charts
     try:
-        bar_chart_path = generate_bar_chart(stats, title)
-        pie_chart_path = generate_pie_chart(stats, title)
+        (bar_key, bar_chart), (pie_key, pie_chart) = await asyncio.gather(
+            get_chart_photo(user_id, "bar", generate_bar_chart, stats, title),
+            get_chart_photo(user_id, "pie", generate_pie_chart, stats, title)
+        )
 
         await callback_query.message.answer(response, reply_markup=main_menu())
-        await callback_query.message.answer_photo(
-            FSInputFile(bar_chart_path),
-        caption = f"{title} - Bar Chart"
-        )
-        await callback_query.message.answer_photo(
-            FSInputFile(pie_chart_path),
-            caption=f"{title} - Pie Chart"
+        await send_chart(callback_query.message, bar_key, bar_chart, f"{title} - Bar Chart")
+        await send_chart(callback_query.message, pie_key, pie_chart, f"{title} - Pie Chart")
+    except (RendererBusy, asyncio.TimeoutError):
+        await callback_query.message.answer(
+            "⏳ Charts are busy right now, please try again in a moment.",
+            reply_markup=main_menu()
         )
-
-        # Clean up chart files
-        if os.path.exists(bar_chart_path):
-            os.remove(bar_chart_path)
-        if os.path.exists(pie_chart_path):
-            os.remove(pie_chart_path)
     except Exception as e:
         await callback_query.message.answer(
             f"❌ Error generating charts: {str(e)}",
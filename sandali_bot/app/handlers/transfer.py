@@ -0,0 +1,94 @@
+import csv
+import os
+import tempfile
+import time
+from zoneinfo import ZoneInfo
+from aiogram import Bot, Router, F
+from aiogram.types import Message, FSInputFile
+from aiogram.filters import Command, CommandObject
+from config import IMPORT_MAX_BYTES
+from keyboards.reply import main_menu
+from utils.chart_cache import chart_cache
+from utils.expense_io import detect_format, import_expenses, export_expenses, RowError
+
+router = Router()
+
+PROGRESS_INTERVAL = 2  # Seconds between progress message edits
+
+IMPORT_HELP = (
+    "📥 Send a .csv or .jsonl file to import expenses.\n\n"
+    "CSV needs a header row with date, category, amount and optionally description.\n"
+    "JSON Lines needs one object per line with the same keys.\n"
+    "Dates are ISO 8601 (2025-05-12 or 2025-05-12T08:58:27); times without an offset use your /timezone."
+)
+
+
+@router.message(Command("import"))
+async def import_cmd(message: Message):
+    await message.answer(IMPORT_HELP, reply_markup=main_menu())
+
+
+@router.message(F.document, flags={"cost": 10, "heavy": "files"})
+async def import_document(message: Message, bot: Bot, user):
+    document = message.document
+    fmt = detect_format(document.file_name)
+    if fmt is None:
+        await message.answer(IMPORT_HELP, reply_markup=main_menu())
+        return
+    if document.file_size and document.file_size > IMPORT_MAX_BYTES:
+        await message.answer(f"❌ File is too large (limit {IMPORT_MAX_BYTES // (1024 * 1024)} MB).", reply_markup=main_menu())
+        return
+
+    user_id = message.from_user.id
+    tz = ZoneInfo(user["timezone"])
+    status = await message.answer("⏳ Importing...")
+    last_update = time.monotonic()
+
+    async def on_progress(imported, skipped):
+        nonlocal last_update
+        if time.monotonic() - last_update >= PROGRESS_INTERVAL:
+            last_update = time.monotonic()
+            await status.edit_text(f"⏳ Imported {imported} rows so far ({skipped} skipped)...")
+
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}")
+    os.close(fd)
+    try:
+        await bot.download(document, destination=path)
+        imported, skipped, errors = await import_expenses(user_id, path, fmt, tz, on_progress)
+    except (RowError, UnicodeDecodeError, csv.Error) as e:
+        await status.edit_text(f"❌ Could not read the file: {e}")
+        return
+    finally:
+        os.unlink(path)
+        # Rows committed before a failure still count
+        chart_cache.invalidate_user(user_id)
+
+    lines = [f"✅ Imported {imported} expenses."]
+    if skipped:
+        lines.append(f"⚠️ Skipped {skipped} invalid rows:")
+        lines.extend(f"• {error}" for error in errors)
+    await status.edit_text("\n".join(lines))
+
+
+@router.message(Command("export"), flags={"cost": 10, "heavy": "files"})
+async def export_cmd(message: Message, command: CommandObject, user):
+    fmt = (command.args or "csv").strip().lower()
+    if fmt not in ("csv", "jsonl"):
+        await message.answer("Usage: /export [csv|jsonl]", reply_markup=main_menu())
+        return
+    user_id = message.from_user.id
+    tz = ZoneInfo(user["timezone"])
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}")
+    os.close(fd)
+    try:
+        count = await export_expenses(user_id, path, fmt, tz)
+        if not count:
+            await message.answer("📭 No expenses found.", reply_markup=main_menu())
+            return
+        await message.answer_document(
+            FSInputFile(path, filename=f"expenses.{fmt}"),
+            caption=f"📤 {count} expenses",
+            reply_markup=main_menu()
+        )
+    finally:
+        os.unlink(path)
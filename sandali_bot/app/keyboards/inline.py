@@ -1,3 +1,4 @@
+from functools import lru_cache
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.types import InlineKeyboardButton
 
@@ -24,6 +25,7 @@ def get_category_keyboard(user_categories):
     builder.adjust(2)  # 2 buttons per row
     return builder.as_markup()
 
+@lru_cache(maxsize=None)
 def get_amount_keyboard():
     builder = InlineKeyboardBuilder()
     for amount in quick_amounts:
@@ -33,6 +35,7 @@ def get_amount_keyboard():
     builder.adjust(2)  # 3 buttons per row for amounts
     return builder.as_markup()
 
+@lru_cache(maxsize=None)
 def get_stats_period_keyboard():
     builder = InlineKeyboardBuilder()
     periods = [
@@ -49,6 +52,7 @@ def get_stats_period_keyboard():
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
+@lru_cache(maxsize=None)
 def get_investment_category_keyboard() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="📈 Stocks",        callback_data="inv_cat:stocks")
@@ -56,10 +60,19 @@ def get_investment_category_keyboard() -> InlineKeyboardMarkup:
     builder.button(text="⛏️ Commodities",   callback_data="inv_cat:commodities")
     return builder.as_markup()
 
-def get_investment_asset_keyboard(category: str, items: list[str]) -> InlineKeyboardMarkup:
+@lru_cache(maxsize=None)
+def get_investment_asset_keyboard(category: str, items: tuple[str, ...]) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     for asset in items:
         builder.button(text=asset, callback_data=f"inv_asset:{asset}")
     builder.button(text="🔙 Back", callback_data="inv_back")
     builder.adjust(2)
     return builder.as_markup()
+
+def get_expense_page_keyboard(next_cursor, first_page):
+    builder = InlineKeyboardBuilder()
+    if not first_page:
+        builder.button(text="⏮ Newest", callback_data="expenses_page:")
+    if next_cursor:
+        builder.button(text="Older ➡️", callback_data=f"expenses_page:{next_cursor}")
+    return builder.as_markup()
@@ -1,5 +1,7 @@
+from functools import lru_cache
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 
+@lru_cache(maxsize=None)
 def main_menu():
     return ReplyKeyboardMarkup(
         keyboard=[
@@ -9,6 +11,7 @@ def main_menu():
         resize_keyboard=True
     )
 
+@lru_cache(maxsize=None)
 def get_phone_keyboard():
     return ReplyKeyboardMarkup(
         keyboard=[
@@ -17,6 +20,7 @@ def get_phone_keyboard():
         resize_keyboard=True
     )
 
+@lru_cache(maxsize=None)
 def cancel_keyboard():
     return ReplyKeyboardMarkup(
         keyboard=[
@@ -25,6 +29,7 @@ def cancel_keyboard():
         resize_keyboard=True
     )
 
+@lru_cache(maxsize=None)
 def delete_keyboard():
     return ReplyKeyboardMarkup(
         keyboard=[
@@ -2,25 +2,80 @@ import asyncio
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.fsm.storage.memory import MemoryStorage
 
-from config import BOT_TOKEN
+from config import BOT_TOKEN, BOT_API_URL, FSM_STORAGE, BOT_MODE
+from db.database import db
+from db.fsm_storage import SQLiteStorage
+from middlewares.metrics import MetricsMiddleware
+from middlewares.registration import RegistrationMiddleware
+from middlewares.throttling import ThrottlingMiddleware
+from utils.metrics import start_metrics_server, stop_metrics_server
+from utils.render_service import renderer
+from utils.api_clients import close_http_client
+from utils.prices import load_price_cache
+from utils.price_refresher import start_price_refresher
+from webhook_server import run_webhook
 from handlers.start import router as start_router
 from handlers.expense import router as expense_router
 from handlers.stats import router as stats_router
 from handlers.investment import router as investment_router
+from handlers.misc import router as misc_router
+from handlers.transfer import router as transfer_router
 
-async def main():
-    bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-    dp = Dispatcher(storage=MemoryStorage())
+def create_bot():
+    # BOT_API_URL points at a self-hosted or fake Bot API server (tools/fake_telegram.py)
+    session = AiohttpSession(api=TelegramAPIServer.from_base(BOT_API_URL)) if BOT_API_URL else None
+    return Bot(token=BOT_TOKEN, session=session, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+
+def create_dispatcher():
+    storage = SQLiteStorage() if FSM_STORAGE == "sqlite" else MemoryStorage()
+    dp = Dispatcher(storage=storage)
+    dp.update.outer_middleware(RegistrationMiddleware())
+    # Registered first so throttled and shed requests are timed too
+    metrics = MetricsMiddleware()
+    dp.message.middleware(metrics)
+    dp.callback_query.middleware(metrics)
+    throttling = ThrottlingMiddleware()
+    dp.message.middleware(throttling)
+    dp.callback_query.middleware(throttling)
 
     dp.include_router(start_router)
     dp.include_router(expense_router)
     dp.include_router(stats_router)
     dp.include_router(investment_router)
+    dp.include_router(misc_router)
+    dp.include_router(transfer_router)
+    return dp
+
+async def start_services():
+    await db.connect()
+    await load_price_cache()
+    await renderer.start()
+    await start_metrics_server()
+    return start_price_refresher()
 
-    await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
+async def stop_services(price_refresher):
+    price_refresher.shutdown(wait=False)
+    await stop_metrics_server()
+    renderer.shutdown()
+    await close_http_client()
+    await db.close()
+
+async def main():
+    bot = create_bot()
+    dp = create_dispatcher()
+    price_refresher = await start_services()
+    try:
+        if BOT_MODE == "webhook":
+            await run_webhook(dp, bot)
+        else:
+            await bot.delete_webhook(drop_pending_updates=True)
+            await dp.start_polling(bot)
+    finally:
+        await stop_services(price_refresher)
 
 if __name__ == "__main__":
     try:
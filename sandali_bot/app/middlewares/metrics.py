@@ -0,0 +1,33 @@
+import time
+
+from aiogram import BaseMiddleware
+
+from utils.metrics import handler_seconds, handler_errors, report_slow
+
+
+def _handler_name(data):
+    handler = data.get("handler")
+    callback = getattr(handler, "callback", None)
+    if callback is None:
+        return "unknown"
+    return f"{callback.__module__}.{callback.__name__}"
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """
+    Inner middleware for messages and callback queries: times each handler
+    call under the handler's qualified name and counts the ones that raise.
+    """
+
+    async def __call__(self, handler, event, data):
+        name = _handler_name(data)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            handler_errors.inc(name, type(e).__name__)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            handler_seconds.observe(elapsed, name)
+            report_slow("handler", name, elapsed)
@@ -0,0 +1,39 @@
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+
+from keyboards.reply import get_phone_keyboard
+from utils.user_cache import user_cache
+
+REGISTER_PROMPT = "Please share your phone number to register first."
+
+
+def _is_registration(update: Update):
+    # /start and the shared contact are all an unregistered user may send
+    message = update.message
+    if message is None:
+        return False
+    return message.contact is not None or (message.text or "").startswith("/start")
+
+
+class RegistrationMiddleware(BaseMiddleware):
+    """
+    Outer update middleware: looks the sender up in user_cache once and
+    passes the row to handlers as `user` (None when unregistered).
+    Updates from unregistered users other than registration itself are
+    answered with a prompt and never reach the handlers.
+    """
+
+    async def __call__(self, handler, event: Update, data):
+        from_user = data.get("event_from_user")
+        if from_user is None:
+            return await handler(event, data)
+        user = await user_cache.get(from_user.id)
+        data["user"] = user
+        if user is not None or _is_registration(event):
+            return await handler(event, data)
+
+        if event.message is not None:
+            await event.message.answer(REGISTER_PROMPT, reply_markup=get_phone_keyboard())
+        elif event.callback_query is not None:
+            await event.callback_query.answer(REGISTER_PROMPT, show_alert=True)
+        return None
@@ -0,0 +1,104 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import CallbackQuery
+
+from config import (
+    THROTTLE_RATE, THROTTLE_BURST, THROTTLE_MAX_USERS, THROTTLE_QUEUE_TIMEOUT, HEAVY_CONCURRENCY
+)
+from utils.metrics import Collected
+from utils.rate_limit import TokenBucket
+
+THROTTLED_TEXT = "⏳ Too many requests, please wait a moment."
+BUSY_TEXT = "⏳ The bot is busy right now, please try again in a moment."
+DUPLICATE_TEXT = "⏳ Still working on your previous request..."
+WARN_INTERVAL = 10  # Seconds between "too many requests" messages to one user
+
+THROTTLE_STATS = {"throttled": 0, "shed": 0, "duplicates": 0}
+Collected("sandali_throttled_total", "Requests refused by the throttling middleware", ("reason",),
+          lambda: {(reason,): count for reason, count in THROTTLE_STATS.items()}, "counter")
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Inner middleware for messages and callback queries. Handlers declare
+    their weight with flags:
+
+        @router.message(..., flags={"cost": 5, "heavy": "charts"})
+
+    Each user has a token bucket refilled at THROTTLE_RATE per minute;
+    a handler runs only if the user can pay its cost (default 1). Heavy
+    handlers additionally take a slot from their global pool in
+    HEAVY_CONCURRENCY, waiting at most THROTTLE_QUEUE_TIMEOUT, and a heavy
+    request identical to one the same user already has in flight is dropped.
+    """
+
+    def __init__(self):
+        self._buckets = OrderedDict()  # user_id: TokenBucket
+        self._warned = {}  # user_id: monotonic time of the last warning
+        self._pools = {name: asyncio.Semaphore(limit) for name, limit in HEAVY_CONCURRENCY.items()}
+        self._inflight = set()  # (user_id, request) pairs being handled
+        self.stats = THROTTLE_STATS
+
+    def _bucket(self, user_id):
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = self._buckets[user_id] = TokenBucket(THROTTLE_RATE, 60, THROTTLE_BURST)
+            while len(self._buckets) > THROTTLE_MAX_USERS:
+                evicted, _ = self._buckets.popitem(last=False)
+                self._warned.pop(evicted, None)
+        else:
+            self._buckets.move_to_end(user_id)
+        return bucket
+
+    async def _reject(self, event, text, user_id=None):
+        if isinstance(event, CallbackQuery):
+            await event.answer(text)
+            return
+        if user_id is not None:
+            # Don't answer every message of a flood
+            now = time.monotonic()
+            if now - self._warned.get(user_id, 0) < WARN_INTERVAL:
+                return
+            self._warned[user_id] = now
+        await event.answer(text)
+
+    async def __call__(self, handler, event, data):
+        from_user = data.get("event_from_user")
+        if from_user is None:
+            return await handler(event, data)
+        user_id = from_user.id
+
+        if not self._bucket(user_id).try_acquire(get_flag(data, "cost", default=1)):
+            self.stats["throttled"] += 1
+            await self._reject(event, THROTTLED_TEXT, user_id)
+            return None
+
+        heavy = get_flag(data, "heavy")
+        if heavy is None:
+            return await handler(event, data)
+
+        request = (user_id, event.data if isinstance(event, CallbackQuery) else event.text or heavy)
+        if request in self._inflight:
+            self.stats["duplicates"] += 1
+            await self._reject(event, DUPLICATE_TEXT)
+            return None
+
+        pool = self._pools[heavy]
+        self._inflight.add(request)
+        try:
+            try:
+                await asyncio.wait_for(pool.acquire(), THROTTLE_QUEUE_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.stats["shed"] += 1
+                await self._reject(event, BUSY_TEXT)
+                return None
+            try:
+                return await handler(event, data)
+            finally:
+                pool.release()
+        finally:
+            self._inflight.discard(request)
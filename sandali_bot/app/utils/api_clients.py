@@ -1,38 +1,95 @@
-import requests
-import time
+import asyncio
+import json
 import os
-from dotenv import load_dotenv
+import time
+
+import httpx
+
+from config import (
+    ALPHA_VANTAGE_API_KEY, ALPHA_VANTAGE_URL, COINGECKO_API_KEY, COINGECKO_URL, METALS_API_KEY,
+    METALS_API_URL, PRICE_CONCURRENCY, PRICE_PROVIDER, FAKE_PRICES_FILE,
+    QUOTES_PER_MINUTE, QUOTES_PER_DAY, COINGECKO_CALLS_PER_MINUTE, METALS_CALLS_PER_DAY
+)
+from utils.rate_limit import TokenBucket, QuotaLimiter
+from utils.circuit_breaker import CircuitBreaker
+from utils.metrics import alpha_vantage_seconds, report_slow
 
-# Load environment variables
-load_dotenv()
+ASSET_CLASSES = {
+    # Stocks
+    "AAPL": "stock", "MSFT": "stock", "AMZN": "stock", "GOOGL": "stock", "META": "stock",
+    "TSLA": "stock", "NVDA": "stock", "JPM": "stock", "WMT": "stock", "V": "stock",
+    # Cryptocurrencies
+    "BTC": "crypto", "ETH": "crypto", "BNB": "crypto", "XRP": "crypto", "ADA": "crypto",
+    "SOL": "crypto", "DOGE": "crypto", "DOT": "crypto", "AVAX": "crypto", "SHIB": "crypto",
+    # Commodities
+    "GOLD": "metal", "SILVER": "metal",
+    "CRUDE_OIL": "commodity", "NAT_GAS": "commodity", "COPPER": "commodity",
+}
 
-# Alpha Vantage API key
-ALPHA_VANTAGE_API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY")
 
-# Cache for prices (asset: (price, timestamp))
-PRICE_CACHE = {}
-CACHE_DURATION = 300  # Cache prices for 5 minutes
+class QuoteError(Exception):
+    # The provider refused the request (rate limit, bad key, ...)
+    pass
 
 
-def fetch_alpha_vantage_price(function, symbol, extra_params=None):
+# Shared client so quote requests reuse keep-alive connections
+_client = None
+
+
+def _http2_available():
     try:
-        base_url = "https://www.alphavantage.co/query"
-        params = {
-            "function": function,
-            "symbol": symbol,
-            "apikey": ALPHA_VANTAGE_API_KEY
-        }
-        if extra_params:
-            params.update(extra_params)
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
 
-        response = requests.get(base_url, params=params, timeout=5)
+
+def get_http_client():
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            http2=_http2_available(),
+            timeout=httpx.Timeout(5.0),
+            limits=httpx.Limits(max_connections=PRICE_CONCURRENCY * 2, max_keepalive_connections=PRICE_CONCURRENCY)
+        )
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def fetch_alpha_vantage_price(function, symbol, extra_params=None):
+    # Returns None when the symbol can't be priced; raises QuoteError or
+    # httpx.HTTPError when Alpha Vantage itself is failing
+    params = {
+        "function": function,
+        "symbol": symbol,
+        "apikey": ALPHA_VANTAGE_API_KEY
+    }
+    if extra_params:
+        params.update(extra_params)
+
+    started = time.perf_counter()
+    try:
+        response = await get_http_client().get(ALPHA_VANTAGE_URL, params=params)
         response.raise_for_status()
         data = response.json()
+    finally:
+        elapsed = time.perf_counter() - started
+        alpha_vantage_seconds.observe(elapsed, function)
+        report_slow("Alpha Vantage request", f"{function} {symbol}", elapsed)
 
-        if "Error Message" in data or "Note" in data:
-            print(f"Alpha Vantage error for {symbol}: {data.get('Error Message', data.get('Note'))}")
-            return None
+    if "Note" in data or "Information" in data:
+        raise QuoteError(f"Alpha Vantage rate limit: {data.get('Note', data.get('Information'))}")
+    if "Error Message" in data:
+        print(f"Alpha Vantage error for {symbol}: {data['Error Message']}")
+        return None
 
+    try:
         if function == "GLOBAL_QUOTE":
             price = data.get("Global Quote", {}).get("05. price")
         elif function == "CURRENCY_EXCHANGE_RATE":
@@ -43,13 +100,49 @@ def fetch_alpha_vantage_price(function, symbol, extra_params=None):
             return None
 
         return float(price) if price else None
-    except (requests.RequestException, ValueError, KeyError) as e:
-        print(f"Error fetching {symbol} price: {e}")
+    except (ValueError, KeyError, IndexError) as e:
+        print(f"Error parsing {symbol} price: {e}")
         return None
 
 
-def get_asset_price(asset):
-    asset_map = {
+class PriceProvider:
+    """
+    Quotes many assets at once. get_prices returns {asset: price} for the
+    assets it could price and leaves the rest out.
+    """
+    name = "base"
+
+    def __init__(self):
+        self.limiter = None  # Upstream quota, or None when unlimited
+        self.breaker = CircuitBreaker(self.name)
+
+    def request_cost(self, symbols):
+        # Upstream requests needed to quote these symbols
+        return 1
+
+    def affordable(self, symbols, reserve=0):
+        # Longest prefix of symbols that fits in the remaining quota, leaving
+        # `reserve` of each bucket's capacity untouched
+        symbols = list(symbols)
+        if self.limiter is None:
+            return symbols
+        available = self.limiter.available(reserve)
+        count = len(symbols)
+        while count and self.request_cost(symbols[:count]) > available:
+            count -= 1
+        return symbols[:count]
+
+    async def get_prices(self, symbols):
+        raise NotImplementedError
+
+
+class AlphaVantageProvider(PriceProvider):
+    """
+    One request per symbol; used for stocks and for commodities other
+    providers don't cover.
+    """
+    name = "alpha_vantage"
+    SYMBOLS = {
         # Stocks
         "AAPL": ("GLOBAL_QUOTE", "AAPL"),
         "MSFT": ("GLOBAL_QUOTE", "MSFT"),
@@ -80,25 +173,148 @@ def get_asset_price(asset):
         "COPPER": ("COMMODITY", "COPPER")
     }
 
-    if asset not in asset_map:
-        return None
+    def __init__(self):
+        super().__init__()
+        self.limiter = QuotaLimiter(
+            TokenBucket(QUOTES_PER_MINUTE, 60),
+            TokenBucket(QUOTES_PER_DAY, 24 * 60 * 60)
+        )
+        self._semaphore = asyncio.Semaphore(PRICE_CONCURRENCY)
+
+    def request_cost(self, symbols):
+        return len(symbols)
+
+    async def _fetch(self, symbol):
+        config = self.SYMBOLS[symbol]
+        extra_params = config[2] if len(config) > 2 else None
+        async with self._semaphore:
+            return await fetch_alpha_vantage_price(config[0], config[1], extra_params)
+
+    async def get_prices(self, symbols):
+        symbols = [symbol for symbol in symbols if symbol in self.SYMBOLS]
+        results = await asyncio.gather(*(self._fetch(symbol) for symbol in symbols), return_exceptions=True)
+        prices = {
+            symbol: result for symbol, result in zip(symbols, results)
+            if result is not None and not isinstance(result, BaseException)
+        }
+        errors = [result for result in results if isinstance(result, BaseException)]
+        # Partial answers still count as a working provider
+        if errors and not prices:
+            raise errors[0]
+        return prices
+
+
+class CoinGeckoProvider(PriceProvider):
+    """
+    simple/price quotes every requested coin in a single request.
+    """
+    name = "coingecko"
+    IDS = {
+        "BTC": "bitcoin", "ETH": "ethereum", "BNB": "binancecoin", "XRP": "ripple",
+        "ADA": "cardano", "SOL": "solana", "DOGE": "dogecoin", "DOT": "polkadot",
+        "AVAX": "avalanche-2", "SHIB": "shiba-inu",
+    }
+
+    def __init__(self):
+        super().__init__()
+        self.limiter = QuotaLimiter(TokenBucket(COINGECKO_CALLS_PER_MINUTE, 60))
+
+    async def get_prices(self, symbols):
+        ids = {self.IDS[symbol]: symbol for symbol in symbols if symbol in self.IDS}
+        if not ids:
+            return {}
+        headers = {"x-cg-demo-api-key": COINGECKO_API_KEY} if COINGECKO_API_KEY else {}
+        response = await get_http_client().get(
+            COINGECKO_URL,
+            params={"ids": ",".join(ids), "vs_currencies": "usd"},
+            headers=headers
+        )
+        response.raise_for_status()
+        data = response.json()
+        if not isinstance(data, dict):
+            raise QuoteError(f"CoinGecko returned {type(data).__name__} instead of an object")
+        prices = {}
+        for coin_id, symbol in ids.items():
+            # Delisted or unpriced coins come back as null or with "usd": null
+            entry = data.get(coin_id)
+            price = entry.get("usd") if isinstance(entry, dict) else None
+            if isinstance(price, (int, float)):
+                prices[symbol] = float(price)
+        return prices
+
+
+class MetalsProvider(PriceProvider):
+    """
+    metals-api returns every requested metal in one call. Only metals quoted
+    per troy ounce are routed here; copper stays on Alpha Vantage, which
+    prices it per tonne.
+    """
+    name = "metals_api"
+    CODES = {"GOLD": "XAU", "SILVER": "XAG"}
+
+    def __init__(self):
+        super().__init__()
+        self.limiter = QuotaLimiter(TokenBucket(METALS_CALLS_PER_DAY, 24 * 60 * 60))
+
+    async def get_prices(self, symbols):
+        codes = {self.CODES[symbol]: symbol for symbol in symbols if symbol in self.CODES}
+        if not codes:
+            return {}
+        response = await get_http_client().get(
+            METALS_API_URL,
+            params={"access_key": METALS_API_KEY, "base": "USD", "symbols": ",".join(codes)}
+        )
+        response.raise_for_status()
+        data = response.json()
+        if not data.get("success", True):
+            raise QuoteError(f"metals-api error: {data.get('error')}")
+        rates = data.get("rates", {})
+        # Rates are ounces per USD; invert for USD per ounce
+        return {symbol: 1 / float(rates[code]) for code, symbol in codes.items() if rates.get(code)}
+
+
+class FakeProvider(PriceProvider):
+    """
+    Reads prices from a JSON file ({"BTC": 65000.0, ...}) so tests and
+    benchmarks run offline. The file is re-read when it changes.
+    """
+    name = "fake"
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._prices = {}
+        self._mtime = None
+
+    async def get_prices(self, symbols):
+        mtime = os.path.getmtime(self.path)
+        if mtime != self._mtime:
+            with open(self.path) as f:
+                self._prices = json.load(f)
+            self._mtime = mtime
+        return {symbol: float(self._prices[symbol]) for symbol in symbols if symbol in self._prices}
+
+
+def build_routes():
+    # Asset class -> provider
+    if PRICE_PROVIDER == "fake":
+        fake = FakeProvider(FAKE_PRICES_FILE)
+        return {asset_class: fake for asset_class in set(ASSET_CLASSES.values())}
+    alpha_vantage = AlphaVantageProvider()
+    return {
+        "stock": alpha_vantage,
+        "crypto": CoinGeckoProvider(),
+        "metal": MetalsProvider() if METALS_API_KEY else alpha_vantage,
+        "commodity": alpha_vantage,
+    }
+
 
-    # Check cache
-    if asset in PRICE_CACHE:
-        price, timestamp = PRICE_CACHE[asset]
-        if time.time() - timestamp < CACHE_DURATION:
-            return price
+ROUTES = build_routes()
 
-    # Fetch price
-    config = asset_map[asset]
-    function = config[0]
-    symbol = config[1]
-    extra_params = config[2] if len(config) > 2 else None
 
-    price = fetch_alpha_vantage_price(function, symbol, extra_params)
+def provider_for(asset):
+    return ROUTES.get(ASSET_CLASSES.get(asset))
 
-    # Update cache
-    if price is not None:
-        PRICE_CACHE[asset] = (price, time.time())
 
-    return price
\ No newline at end of file
+def all_providers():
+    return list({id(provider): provider for provider in ROUTES.values()}.values())
@@ -0,0 +1,45 @@
+from collections import OrderedDict
+
+from config import CATEGORY_CACHE_SIZE
+from db.database import db
+from keyboards.inline import get_category_keyboard
+from utils.metrics import register_cache
+
+
+class CategoryCache:
+    """
+    LRU cache of each user's custom categories together with the category
+    keyboard built from them. Entries are dropped with invalidate() whenever
+    the user's categories change.
+    """
+
+    def __init__(self, max_entries=CATEGORY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # user_id: (categories, keyboard)
+        self.hits = 0
+        self.misses = 0
+
+    async def _entry(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(user_id)
+            return entry
+        self.misses += 1
+        categories = await db.get_categories(user_id)
+        entry = (categories, get_category_keyboard(categories))
+        if self.max_entries:
+            self._entries[user_id] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    async def get_keyboard(self, user_id):
+        return (await self._entry(user_id))[1]
+
+    def invalidate(self, user_id):
+        self._entries.pop(user_id, None)
+
+
+category_cache = CategoryCache()
+register_cache("category", lambda: (category_cache.hits, category_cache.misses))
@@ -0,0 +1,83 @@
+import hashlib
+from collections import OrderedDict, defaultdict
+
+from config import CHART_CACHE_SIZE, CHART_PRESET, CHART_DPI
+from utils.metrics import register_cache
+
+# Part of every key so changing the preset never serves stale images
+CHART_STYLE = f"{CHART_PRESET}:{CHART_DPI or 'default'}"
+
+
+class ChartCacheEntry:
+    def __init__(self, png):
+        self.png = png
+        self.file_id = None  # Telegram file_id once the chart has been uploaded
+        self.user_ids = set()
+
+
+class ChartCache:
+    """
+    LRU cache of rendered charts keyed by a hash of what was drawn.
+    After the first upload the Telegram file_id is kept as well, so repeat
+    requests skip both rendering and uploading.
+    """
+
+    def __init__(self, max_entries=CHART_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._user_keys = defaultdict(set)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(title, stats, chart_type, style=CHART_STYLE):
+        payload = repr((title, tuple(tuple(row) for row in stats), chart_type, style))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, user_id, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        self._track(user_id, key, entry)
+        return entry
+
+    def put(self, user_id, key, png):
+        entry = ChartCacheEntry(png)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._track(user_id, key, entry)
+        while len(self._entries) > self.max_entries:
+            self._forget(*self._entries.popitem(last=False))
+        return entry
+
+    def set_file_id(self, key, file_id):
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.file_id = file_id
+
+    def invalidate_user(self, user_id):
+        for key in list(self._user_keys.get(user_id, ())):
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._forget(key, entry)
+        self._user_keys.pop(user_id, None)
+
+    def _track(self, user_id, key, entry):
+        entry.user_ids.add(user_id)
+        self._user_keys[user_id].add(key)
+
+    def _forget(self, key, entry):
+        for user_id in entry.user_ids:
+            keys = self._user_keys.get(user_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._user_keys[user_id]
+
+
+# Global chart cache instance
+chart_cache = ChartCache()
+register_cache("chart", lambda: (chart_cache.hits, chart_cache.misses))
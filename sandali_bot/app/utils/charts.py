@@ -1,11 +1,36 @@
+import matplotlib
+matplotlib.use("Agg")  # Headless rendering in worker processes
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
-import os
+from io import BytesIO
+
+from config import CHART_PRESET, CHART_DPI
+
+# dpi and figure sizes (inches) per preset
+CHART_PRESETS = {
+    "telegram": {"dpi": 128, "bar_size": (10, 6), "pie_size": (8, 8)},
+    "print": {"dpi": 300, "bar_size": (10, 6), "pie_size": (8, 8)},
+}
+
+preset = CHART_PRESETS.get(CHART_PRESET, CHART_PRESETS["telegram"])
+dpi = int(CHART_DPI) if CHART_DPI else preset["dpi"]
+
+# Reused across renders in the same worker process
+_buffer = BytesIO()
+
+
+def _to_png_bytes(fig):
+    _buffer.seek(0)
+    _buffer.truncate()
+    fig.savefig(_buffer, format="png", dpi=dpi, bbox_inches="tight")
+    plt.close(fig)
+    return _buffer.getvalue()
 
 def generate_bar_chart(stats, title):
     """
     Generate a visually appealing bar chart for spending by category.
+    Returns the chart as PNG bytes.
     """
     # Extract categories and amounts
     categories, amounts = zip(*stats) if stats else ([], [])
@@ -18,7 +43,7 @@ def generate_bar_chart(stats, title):
     plt.style.use("seaborn-v0_8")
 
     # Create figure and axis
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = plt.subplots(figsize=preset["bar_size"])
 
     # Use the Spectral color palette for vibrant, cohesive colors
     colors = sns.color_palette("Spectral", len(categories))
@@ -54,12 +79,7 @@ def generate_bar_chart(stats, title):
     # Adjust layout to prevent label cutoff
     plt.tight_layout()
 
-    # Save the chart
-    output_path = f"charts/bar_{title.replace(' ', '_')}.png"
-    os.makedirs("charts", exist_ok=True)
-    plt.savefig(output_path, dpi=300, bbox_inches="tight")
-    plt.close()
-    return output_path
+    return _to_png_bytes(fig)
 
 def generate_pie_chart(stats, title):
     """
@@ -67,6 +87,7 @@ def generate_pie_chart(stats, title):
     - Title in the top-left corner, smaller font.
     - Category labels in a legend in the top-left corner.
     - Smaller percentage labels outside the circumference with curved connecting lines.
+    Returns the chart as PNG bytes.
     """
     # Extract categories and amounts
     categories, amounts = zip(*stats) if stats else ([], [])
@@ -79,7 +100,7 @@ def generate_pie_chart(stats, title):
     plt.style.use("seaborn-v0_8")
 
     # Create figure
-    fig, ax = plt.subplots(figsize=(8, 8))
+    fig, ax = plt.subplots(figsize=preset["pie_size"])
 
     # Use the Spectral color palette for vibrant colors
     colors = sns.color_palette("Spectral", len(categories))
@@ -154,9 +175,4 @@ def generate_pie_chart(stats, title):
     # Equal aspect ratio for a circular pie chart
     ax.axis("equal")
 
-    # Save the chart
-    output_path = f"charts/pie_{title.replace(' ', '_')}.png"
-    os.makedirs("charts", exist_ok=True)
-    plt.savefig(output_path, dpi=300, bbox_inches="tight")
-    plt.close()
-    return output_path
\ No newline at end of file
+    return _to_png_bytes(fig)
@@ -0,0 +1,61 @@
+import time
+
+from config import BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Stops calling an upstream after repeated failures. Once open, calls fail
+    fast until reset_timeout has passed; then a single probe is let through
+    (half-open) and its outcome closes or re-opens the breaker. A probe that
+    never reports back is given up after another reset_timeout.
+    """
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.opened_at = None
+        self._probing = False
+        self._probe_started = None
+
+    def allow(self):
+        now = time.monotonic()
+        if self.state == OPEN and now - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self._probing = False
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and (not self._probing or now - self._probe_started >= self.reset_timeout):
+            self._probing = True
+            self._probe_started = now
+            return True
+        return False
+
+    def release(self):
+        # The allowed call never reached upstream; let the next one probe instead
+        self._probing = False
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.trips += 1
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self._probing = False
+
+    def snapshot(self):
+        return {"state": self.state, "failures": self.failures, "trips": self.trips}
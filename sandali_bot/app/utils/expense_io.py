@@ -0,0 +1,141 @@
+import csv
+import json
+import math
+import os
+from datetime import datetime, time, timedelta, timezone
+
+from config import IMPORT_CHUNK_ROWS, EXPORT_CHUNK_ROWS
+from db.database import db
+
+# File extension -> format
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+FIELDS = ("date", "category", "amount", "description")
+MAX_CATEGORY_LENGTH = 64
+MAX_DESCRIPTION_LENGTH = 500
+MAX_REPORTED_ERRORS = 5
+# Oldest expense date an import accepts; the newest is a day from now
+MIN_DATE = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+class RowError(ValueError):
+    pass
+
+
+def detect_format(filename):
+    return FORMATS.get(os.path.splitext(filename or "")[1].lower())
+
+
+def iter_records(f, fmt):
+    """
+    Yields (line number, record dict) one row at a time; a record is a
+    RowError when the line itself can't be read.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        missing = {"date", "category", "amount"} - set(reader.fieldnames or ())
+        if missing:
+            raise RowError(f"CSV header is missing: {', '.join(sorted(missing))}")
+        while True:
+            try:
+                record = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                # e.g. a field over csv.field_size_limit(); reading resumes on the next line
+                record = RowError(f"unreadable CSV row ({e})")
+            yield reader.line_num, record
+    for line_no, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, RowError(f"invalid JSON ({e.msg})")
+            continue
+        if not isinstance(record, dict):
+            record = RowError("expected a JSON object")
+        yield line_no, record
+
+
+def parse_record(record, tz):
+    # Returns (category, amount, description, date_iso, ts) or raises RowError
+    category = str(record.get("category") or "").strip()
+    if not category:
+        raise RowError("category is empty")
+    if len(category) > MAX_CATEGORY_LENGTH:
+        raise RowError("category is too long")
+
+    try:
+        amount = float(record.get("amount"))
+    except (TypeError, ValueError):
+        raise RowError(f"amount {record.get('amount')!r} is not a number")
+    if not math.isfinite(amount):
+        raise RowError("amount is not a finite number")
+
+    raw_date = str(record.get("date") or "").strip()
+    try:
+        date = datetime.fromisoformat(raw_date.replace("Z", "+00:00"))
+    except ValueError:
+        raise RowError(f"date {raw_date!r} is not ISO 8601")
+    if len(raw_date) == 10:
+        date = datetime.combine(date.date(), time(12))  # Date-only rows land at local noon
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=tz)  # Naive times are in the user's timezone
+    if not MIN_DATE <= date <= datetime.now(timezone.utc) + timedelta(days=1):
+        raise RowError(f"date {raw_date!r} is out of range")
+
+    description = str(record.get("description") or "").strip() or None
+    if description and len(description) > MAX_DESCRIPTION_LENGTH:
+        raise RowError("description is too long")
+    return category, amount, description, date.isoformat(), int(date.timestamp())
+
+
+async def import_expenses(user_id, path, fmt, tz, on_progress=None):
+    """
+    Streams the file at path into the user's expenses, inserting
+    IMPORT_CHUNK_ROWS rows per transaction. Invalid rows are skipped.
+    Returns (imported, skipped, errors) where errors holds the first few
+    problems as "line N: reason".
+    """
+    imported = skipped = 0
+    errors = []
+    chunk = []
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for line_no, record in iter_records(f, fmt):
+            try:
+                if isinstance(record, RowError):
+                    raise record
+                chunk.append(parse_record(record, tz))
+            except RowError as e:
+                skipped += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append(f"line {line_no}: {e}")
+                continue
+            if len(chunk) >= IMPORT_CHUNK_ROWS:
+                await db.add_expenses(user_id, chunk)
+                imported += len(chunk)
+                chunk = []
+                if on_progress:
+                    await on_progress(imported, skipped)
+    if chunk:
+        await db.add_expenses(user_id, chunk)
+        imported += len(chunk)
+    return imported, skipped, errors
+
+
+async def export_expenses(user_id, path, fmt, tz):
+    # Writes the user's expenses to path as they are read; returns the row count
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f) if fmt == "csv" else None
+        if writer:
+            writer.writerow(FIELDS)
+        async for category, amount, description, ts in db.iter_expenses(user_id, EXPORT_CHUNK_ROWS):
+            date = datetime.fromtimestamp(ts, tz).isoformat()
+            if writer:
+                writer.writerow((date, category, amount, description or ""))
+            else:
+                f.write(json.dumps({"date": date, "category": category, "amount": amount,
+                                    "description": description}, ensure_ascii=False) + "\n")
+            count += 1
+    return count
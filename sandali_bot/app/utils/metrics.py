@@ -0,0 +1,190 @@
+import functools
+import inspect
+import time
+from collections import defaultdict
+
+from aiohttp import web
+
+from config import METRICS_HOST, METRICS_PORT, SLOW_OP_MS
+
+# Seconds; covers cache hits (sub-millisecond) up to chart renders and slow upstreams
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REGISTRY = []
+# cache name: callable returning (hits, misses)
+CACHES = {}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = defaultdict(float)
+        REGISTRY.append(self)
+
+    def inc(self, *labels, amount=1):
+        self._values[labels] += amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self._values.items():
+            yield f"{self.name}{_labels(self.labels, labels)} {value}"
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}  # labels: [bucket counts..., sum, count]
+        REGISTRY.append(self)
+
+    def observe(self, seconds, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                series[i] += 1
+        series[-2] += seconds
+        series[-1] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        names = self.labels + ("le",)
+        for labels, series in self._series.items():
+            for bound, count in zip(self.buckets, series):
+                yield f"{self.name}_bucket{_labels(names, labels + (bound,))} {count}"
+            yield f"{self.name}_bucket{_labels(names, labels + ('+Inf',))} {series[-1]}"
+            yield f"{self.name}_sum{_labels(self.labels, labels)} {series[-2]}"
+            yield f"{self.name}_count{_labels(self.labels, labels)} {series[-1]}"
+
+
+class Collected:
+    """
+    Read at scrape time: collect() returns {labels tuple: value}, so numbers
+    other modules already keep (cache stats, breaker states) are exported
+    without double bookkeeping.
+    """
+
+    def __init__(self, name, help, labels, collect, type="gauge"):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.collect = collect
+        self.type = type
+        REGISTRY.append(self)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+        for labels, value in self.collect().items():
+            yield f"{self.name}{_labels(self.labels, labels)} {value}"
+
+
+handler_seconds = Histogram("sandali_handler_seconds", "Time spent in update handlers", ("handler",))
+handler_errors = Counter("sandali_handler_errors_total", "Handlers that raised", ("handler", "error"))
+db_query_seconds = Histogram("sandali_db_query_seconds", "Database method latency", ("method",))
+chart_render_seconds = Histogram("sandali_chart_render_seconds", "Chart drawing time in the worker", ("chart",))
+chart_wait_seconds = Histogram("sandali_chart_wait_seconds", "Time charts spent queued for a worker", ("chart",))
+upstream_seconds = Histogram("sandali_upstream_seconds", "Price provider batch latency", ("provider",))
+upstream_errors = Counter("sandali_upstream_errors_total", "Failed price provider batches", ("provider", "error"))
+alpha_vantage_seconds = Histogram("sandali_alpha_vantage_request_seconds", "Alpha Vantage request latency", ("function",))
+
+
+def register_cache(name, counts):
+    CACHES[name] = counts
+
+
+def _cache_requests():
+    samples = {}
+    for name, counts in CACHES.items():
+        hits, misses = counts()
+        samples[(name, "hit")] = hits
+        samples[(name, "miss")] = misses
+    return samples
+
+
+def _cache_hit_ratio():
+    samples = {}
+    for name, counts in CACHES.items():
+        hits, misses = counts()
+        if hits + misses:
+            samples[(name,)] = round(hits / (hits + misses), 4)
+    return samples
+
+
+Collected("sandali_cache_requests_total", "Cache lookups by result", ("cache", "result"), _cache_requests, "counter")
+Collected("sandali_cache_hit_ratio", "Share of cache lookups that hit", ("cache",), _cache_hit_ratio)
+
+
+def report_slow(kind, name, seconds):
+    if SLOW_OP_MS and seconds * 1000 >= SLOW_OP_MS:
+        print(f"Slow {kind} {name}: {seconds * 1000:.0f} ms")
+
+
+def instrument_methods(cls, histogram=db_query_seconds, kind="query"):
+    # Times every public coroutine method of cls under its method name
+    def wrap(name, method):
+        @functools.wraps(method)
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                histogram.observe(elapsed, name)
+                report_slow(kind, name, elapsed)
+        return timed
+
+    for name, method in list(vars(cls).items()):
+        if not name.startswith("_") and inspect.iscoroutinefunction(method):
+            setattr(cls, name, wrap(name, method))
+    return cls
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+async def _metrics(request):
+    return web.Response(text=render(), content_type="text/plain", charset="utf-8")
+
+
+_runner = None
+
+
+async def start_metrics_server(host=METRICS_HOST, port=METRICS_PORT):
+    global _runner
+    if not port or _runner is not None:
+        return
+    app = web.Application()
+    app.router.add_get("/metrics", _metrics)
+    _runner = web.AppRunner(app)
+    await _runner.setup()
+    await web.TCPSite(_runner, host, port).start()
+    print(f"Metrics on http://{host}:{port}/metrics")
+
+
+async def stop_metrics_server():
+    global _runner
+    if _runner is not None:
+        await _runner.cleanup()
+        _runner = None
@@ -0,0 +1,71 @@
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from config import PRICE_REFRESH_TICK, PRICE_REFRESH_QUOTA_SHARE
+from db.database import db
+from utils.api_clients import ASSET_CLASSES, provider_for
+from utils.prices import PRICE_CACHE, NEGATIVE_CACHE, refresh_prices
+
+# Shortest time between background refreshes per asset class, in seconds;
+# quota-limited providers stretch these further (see quota_interval)
+REFRESH_INTERVALS = {
+    "crypto": 120,      # Crypto trades around the clock
+    "stock": 240,
+    "metal": 900,
+    "commodity": 3600,  # Commodity series update daily
+}
+
+
+def quota_interval(provider, assets):
+    # Seconds between refreshes of all these assets that keeps the refresher
+    # within its share of the provider's sustained (e.g. daily) quota
+    if provider.limiter is None or not assets:
+        return 0
+    if PRICE_REFRESH_QUOTA_SHARE <= 0:
+        return float("inf")
+    return provider.request_cost(assets) / (provider.limiter.rate() * PRICE_REFRESH_QUOTA_SHARE)
+
+
+def is_due(asset, now, min_interval=0):
+    if NEGATIVE_CACHE.get(asset, 0) > now:
+        return False  # Failed recently; retried once NEGATIVE_CACHE_TTL has passed
+    cached = PRICE_CACHE.get(asset)
+    if cached is None:
+        return True
+    return now - cached[1] >= max(REFRESH_INTERVALS[ASSET_CLASSES[asset]], min_interval)
+
+
+async def refresh_held_prices():
+    # Most-held assets first, so when a quota runs out the prices
+    # that the most users will look at are the fresh ones
+    now = time.time()
+    held = defaultdict(list)
+    for asset, _ in await db.get_held_assets():
+        provider = provider_for(asset)
+        if provider is not None:
+            held[provider].append(asset)
+
+    batch = []
+    reserve = 1 - PRICE_REFRESH_QUOTA_SHARE
+    for provider, assets in held.items():
+        min_interval = quota_interval(provider, assets)
+        due = [asset for asset in assets if is_due(asset, now, min_interval)]
+        batch.extend(provider.affordable(due, reserve))
+    if batch:
+        await refresh_prices(batch)
+
+
+def start_price_refresher():
+    scheduler = AsyncIOScheduler()
+    scheduler.add_job(
+        refresh_held_prices, "interval",
+        seconds=PRICE_REFRESH_TICK,
+        max_instances=1,
+        coalesce=True,
+        next_run_time=datetime.now()
+    )
+    scheduler.start()
+    return scheduler
@@ -0,0 +1,188 @@
+import asyncio
+import time
+from collections import defaultdict
+
+import httpx
+
+from config import PRICE_BUDGET, PRICE_MAX_AGE, NEGATIVE_CACHE_TTL
+from db.database import db
+from utils.api_clients import provider_for, all_providers, QuoteError
+from utils.circuit_breaker import CLOSED, OPEN, HALF_OPEN
+from utils.metrics import Collected, register_cache, report_slow, upstream_seconds, upstream_errors
+
+# Cache for prices (asset: (price, timestamp)), mirrored in the prices table
+PRICE_CACHE = {}
+CACHE_DURATION = 300  # Cache prices for 5 minutes
+
+# Batch fetches in flight per asset; concurrent callers share one upstream request
+_INFLIGHT = {}
+# Assets whose last lookup failed (asset: retry_after); looked up again only after NEGATIVE_CACHE_TTL
+NEGATIVE_CACHE = {}
+PRICE_STATS = {
+    "hits": 0, "stale": 0, "misses": 0, "coalesced": 0,
+    "rate_limited": 0, "negative_hits": 0, "breaker_rejections": 0,
+}
+
+
+async def load_price_cache():
+    # Warm the in-memory cache from the prices table so restarts don't start cold
+    for asset, price, fetched_at, _ in await db.get_prices():
+        PRICE_CACHE[asset] = (price, fetched_at)
+
+
+async def _fetch_batch(provider, assets):
+    requested = assets
+    # Quote what the quota allows now; the rest fall back to their last known price.
+    # Checked before the breaker so a half-open probe is only spent on a real request.
+    assets = provider.affordable(assets)
+    if not assets:
+        PRICE_STATS["rate_limited"] += 1
+        return {}
+    if not provider.breaker.allow():
+        PRICE_STATS["breaker_rejections"] += 1
+        return {}
+    if provider.limiter is not None and not provider.limiter.try_acquire(provider.request_cost(assets)):
+        provider.breaker.release()
+        PRICE_STATS["rate_limited"] += 1
+        return {}
+    started = time.perf_counter()
+    try:
+        prices = await provider.get_prices(assets)
+    except (QuoteError, httpx.HTTPError, ValueError, KeyError, TypeError, OSError) as e:
+        print(f"Error fetching prices from {provider.name}: {e}")
+        upstream_errors.inc(provider.name, type(e).__name__)
+        provider.breaker.record_failure()
+        prices = {}
+    else:
+        provider.breaker.record_success()
+    elapsed = time.perf_counter() - started
+    upstream_seconds.observe(elapsed, provider.name)
+    report_slow("upstream", provider.name, elapsed)
+
+    # Update cache
+    fetched_at = time.time()
+    for asset in assets:
+        if asset not in prices:
+            NEGATIVE_CACHE[asset] = fetched_at + NEGATIVE_CACHE_TTL
+    for asset, price in prices.items():
+        PRICE_CACHE[asset] = (price, fetched_at)
+        NEGATIVE_CACHE.pop(asset, None)
+    if prices:
+        try:
+            await db.save_prices([(asset, price, fetched_at, provider.name) for asset, price in prices.items()])
+        except Exception as e:
+            print(f"Error saving prices: {e}")
+    return {asset: prices[asset] for asset in requested if asset in prices}
+
+
+def _release(task, assets):
+    for asset in assets:
+        if _INFLIGHT.get(asset) is task:
+            del _INFLIGHT[asset]
+
+
+def _start_fetch(assets):
+    # Join fetches already in flight and start one batch per provider for the rest.
+    # Returns {asset: task}; each task resolves to {asset: price} for its batch.
+    tasks = {}
+    groups = defaultdict(list)
+    for asset in assets:
+        task = _INFLIGHT.get(asset)
+        if task is not None:
+            PRICE_STATS["coalesced"] += 1
+            tasks[asset] = task
+        else:
+            groups[provider_for(asset)].append(asset)
+
+    for provider, group in groups.items():
+        task = asyncio.create_task(_fetch_batch(provider, group))
+        for asset in group:
+            _INFLIGHT[asset] = task
+            tasks[asset] = task
+        task.add_done_callback(lambda t, group=group: _release(t, group))
+    return tasks
+
+
+def _batch_result(task):
+    if task.done() and not task.cancelled() and task.exception() is None:
+        return task.result()
+    return {}
+
+
+async def refresh_prices(assets):
+    tasks = _start_fetch(assets)
+    if tasks:
+        # Shared tasks are never cancelled here; asyncio.wait leaves them running
+        await asyncio.wait(set(tasks.values()))
+    return {asset: _batch_result(task).get(asset) for asset, task in tasks.items()}
+
+
+async def get_asset_prices(assets, budget=PRICE_BUDGET):
+    """
+    Look up several assets at once. Fresh prices come from the cache, stale
+    ones (up to PRICE_MAX_AGE) are returned immediately while a background
+    fetch refreshes them, and the rest are fetched with one request per
+    provider. Assets still missing when the budget (seconds) runs out fall
+    back to their last known price, or None.
+    """
+    prices = {}
+    stale = []
+    missing = []
+    now = time.time()
+    for asset in set(assets):
+        if provider_for(asset) is None:
+            prices[asset] = None
+            continue
+        cached = PRICE_CACHE.get(asset)
+        age = now - cached[1] if cached else None
+        if cached and age < CACHE_DURATION:
+            PRICE_STATS["hits"] += 1
+            prices[asset] = cached[0]
+        elif NEGATIVE_CACHE.get(asset, 0) > now:
+            # Failed recently: answer with the last known price instead of retrying
+            PRICE_STATS["negative_hits"] += 1
+            prices[asset] = cached[0] if cached else None
+        elif cached and age < PRICE_MAX_AGE:
+            PRICE_STATS["stale"] += 1
+            prices[asset] = cached[0]
+            stale.append(asset)
+        else:
+            PRICE_STATS["misses"] += 1
+            missing.append(asset)
+
+    if stale:
+        _start_fetch(stale)
+    if missing:
+        tasks = _start_fetch(missing)
+        await asyncio.wait(set(tasks.values()), timeout=budget)
+        for asset, task in tasks.items():
+            price = _batch_result(task).get(asset)
+            if price is None and asset in PRICE_CACHE:
+                price = PRICE_CACHE[asset][0]
+            prices[asset] = price
+    return prices
+
+
+async def get_asset_price(asset):
+    return (await get_asset_prices([asset])).get(asset)
+
+
+def breaker_states():
+    return {provider.name: provider.breaker.snapshot() for provider in all_providers()}
+
+
+def _breaker_samples():
+    return {
+        (name, state): int(snapshot["state"] == state)
+        for name, snapshot in breaker_states().items()
+        for state in (CLOSED, OPEN, HALF_OPEN)
+    }
+
+
+Collected("sandali_price_lookups_total", "Price lookups by outcome", ("result",),
+          lambda: {(result,): count for result, count in PRICE_STATS.items()}, "counter")
+Collected("sandali_breaker_state", "Circuit breaker state per provider (1 = current)", ("provider", "state"), _breaker_samples)
+Collected("sandali_breaker_trips_total", "Times each provider's breaker opened", ("provider",),
+          lambda: {(name,): snapshot["trips"] for name, snapshot in breaker_states().items()}, "counter")
+# Fresh and stale-while-revalidate answers both count as hits
+register_cache("price", lambda: (PRICE_STATS["hits"] + PRICE_STATS["stale"], PRICE_STATS["misses"]))
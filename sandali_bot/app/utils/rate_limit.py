@@ -0,0 +1,59 @@
+import time
+
+
+class TokenBucket:
+    """
+    Allows `rate` operations per `per` seconds, with bursts up to `capacity`.
+    """
+
+    def __init__(self, rate, per, capacity=None):
+        self.fill_rate = rate / per
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+        self.updated = now
+
+    def available(self):
+        self._refill()
+        return self.tokens
+
+    def peek(self, cost=1):
+        return self.available() >= cost
+
+    def try_acquire(self, cost=1):
+        self._refill()
+        if self.tokens < cost:
+            return False
+        self.tokens -= cost
+        return True
+
+
+class QuotaLimiter:
+    """
+    Several buckets that must all have room, e.g. a per-minute and a per-day quota.
+    """
+
+    def __init__(self, *buckets):
+        self.buckets = buckets
+
+    def available(self, reserve=0):
+        # Tokens left once `reserve` (a share of each bucket's capacity) is set aside
+        return min(bucket.available() - reserve * bucket.capacity for bucket in self.buckets)
+
+    def rate(self):
+        # Sustained operations per second, set by the slowest bucket
+        return min(bucket.fill_rate for bucket in self.buckets)
+
+    def peek(self, cost=1):
+        return all(bucket.peek(cost) for bucket in self.buckets)
+
+    def try_acquire(self, cost=1):
+        if not self.peek(cost):
+            return False
+        for bucket in self.buckets:
+            bucket.try_acquire(cost)
+        return True
@@ -0,0 +1,83 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config import CHART_WORKERS, CHART_MAX_PENDING, CHART_TIMEOUT
+from utils.metrics import chart_render_seconds, chart_wait_seconds, report_slow
+
+
+class RendererBusy(Exception):
+    pass
+
+
+def _warm_up():
+    # Runs once per worker so the matplotlib/seaborn import cost is paid at startup
+    import utils.charts  # noqa: F401
+
+
+def _ping():
+    return os.getpid()
+
+
+def _timed_call(func, *args):
+    # Runs in the worker, so the drawing time excludes queueing and pickling
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+class ChartRenderer:
+    """
+    Renders charts in a pool of worker processes. pyplot keeps global state,
+    so figures can't be drawn safely from threads; processes also let
+    concurrent /stats requests use every core.
+    """
+
+    def __init__(self, workers=CHART_WORKERS, max_pending=CHART_MAX_PENDING, timeout=CHART_TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self._pool = None
+        # Bounds jobs queued or running; a slot is freed only when the worker is done
+        self._slots = asyncio.Semaphore(max_pending)
+
+    async def start(self):
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_up
+        )
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._pool, _ping) for _ in range(self.workers)))
+
+    async def render(self, func, *args):
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            raise RendererBusy("Chart renderer is overloaded") from None
+
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            job = self._pool.submit(_timed_call, func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        job.add_done_callback(lambda _: loop.call_soon_threadsafe(self._slots.release))
+        # A timed-out job still queued is cancelled; a running one keeps its slot until it ends
+        result, drawing = await asyncio.wait_for(asyncio.wrap_future(job), self.timeout)
+        elapsed = time.perf_counter() - started
+        chart_render_seconds.observe(drawing, func.__name__)
+        chart_wait_seconds.observe(max(elapsed - drawing, 0), func.__name__)
+        report_slow("chart", func.__name__, elapsed)
+        return result
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+# Global renderer instance, started on bot startup
+renderer = ChartRenderer()
@@ -0,0 +1,68 @@
+import time
+from collections import OrderedDict
+
+from config import USER_CACHE_SIZE, USER_CACHE_TTL, USER_NEGATIVE_TTL
+from db.database import db
+from utils.metrics import register_cache
+
+USER_FIELDS = ("telegram_id", "phone", "username", "first_name", "last_name", "timezone")
+
+
+class UserCache:
+    """
+    LRU cache of users rows as dicts, each kept for ttl seconds. Unknown
+    users are cached too (as None), but only for negative_ttl seconds: that
+    keeps unregistered traffic off the database without hiding for long a
+    registration made on another replica. Writes go through add_user/set_timezone so
+    the cache never serves a row older than its own changes.
+    """
+
+    def __init__(self, max_entries=USER_CACHE_SIZE, ttl=USER_CACHE_TTL, negative_ttl=USER_NEGATIVE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()  # user_id: (user or None, expires_at)
+        self.hits = 0
+        self.misses = 0
+
+    def _put(self, user_id, user):
+        if not self.max_entries:
+            return
+        ttl = self.ttl if user is not None else self.negative_ttl
+        self._entries[user_id] = (user, time.monotonic() + ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _load(self, user_id):
+        row = await db.get_user(user_id)
+        user = dict(zip(USER_FIELDS, row)) if row else None
+        self._put(user_id, user)
+        return user
+
+    async def get(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[1] > time.monotonic():
+            self.hits += 1
+            self._entries.move_to_end(user_id)
+            return entry[0]
+        self.misses += 1
+        return await self._load(user_id)
+
+    async def add_user(self, telegram_id, phone, username, first_name, last_name):
+        await db.add_user(telegram_id, phone, username, first_name, last_name)
+        # Re-read so settings kept by the upsert (timezone) are included
+        return await self._load(telegram_id)
+
+    async def set_timezone(self, user_id, timezone_name):
+        if not await db.set_timezone(user_id, timezone_name):
+            return False
+        await self._load(user_id)
+        return True
+
+    def invalidate(self, user_id):
+        self._entries.pop(user_id, None)
+
+
+user_cache = UserCache()
+register_cache("user", lambda: (user_cache.hits, user_cache.misses))
@@ -0,0 +1,89 @@
+import asyncio
+import signal
+
+from aiohttp import web
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from config import (
+    WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_HOST, WEBHOOK_PORT,
+    WEBHOOK_MAX_CONNECTIONS, WEBHOOK_CONCURRENCY, WEBHOOK_DRAIN_TIMEOUT
+)
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """
+    Acknowledges each update right away and handles it in the background,
+    with at most `concurrency` handlers running. When all slots are busy the
+    request waits for one, which pushes back on Telegram instead of piling
+    up tasks. On shutdown new updates get 503 (Telegram redelivers them,
+    possibly to another replica) while in-flight ones are given
+    drain_timeout seconds to finish.
+    """
+
+    def __init__(self, dispatcher, bot, concurrency=WEBHOOK_CONCURRENCY,
+                 drain_timeout=WEBHOOK_DRAIN_TIMEOUT, **kwargs):
+        super().__init__(dispatcher, bot, handle_in_background=True, **kwargs)
+        self.drain_timeout = drain_timeout
+        self._slots = asyncio.Semaphore(concurrency)
+        self._draining = False
+
+    async def _handle_request_background(self, bot, request):
+        if self._draining:
+            return web.Response(status=503)
+        update = await request.json(loads=bot.session.json_loads)
+        await self._slots.acquire()
+        if self._draining:
+            self._slots.release()
+            return web.Response(status=503)
+        task = asyncio.create_task(self._background_feed_update(bot=bot, update=update))
+        self._background_feed_update_tasks.add(task)
+        task.add_done_callback(self._background_feed_update_tasks.discard)
+        task.add_done_callback(lambda _: self._slots.release())
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def drain(self):
+        self._draining = True
+        tasks = set(self._background_feed_update_tasks)
+        if not tasks:
+            return
+        print(f"Draining {len(tasks)} in-flight updates...")
+        _, pending = await asyncio.wait(tasks, timeout=self.drain_timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            print(f"Cancelled {len(pending)} updates still running after {self.drain_timeout}s")
+
+    async def close(self):
+        await self.drain()
+        await super().close()
+
+
+async def run_webhook(dp, bot):
+    # Serves updates until SIGINT/SIGTERM, then drains and stops
+    app = web.Application()
+    handler = BoundedRequestHandler(dp, bot, secret_token=WEBHOOK_SECRET)
+    handler.register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+
+    # Pending updates are kept: Telegram queues them while replicas restart
+    await bot.set_webhook(
+        f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}",
+        secret_token=WEBHOOK_SECRET,
+        max_connections=WEBHOOK_MAX_CONNECTIONS,
+        allowed_updates=dp.resolve_used_update_types()
+    )
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+    print(f"Webhook server listening on {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        # Stops accepting connections, then runs on_shutdown (drain, close session)
+        await runner.cleanup()
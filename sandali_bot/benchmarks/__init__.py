@@ -0,0 +1,18 @@
+"""
+Benchmarks for the database layer and chart rendering.
+
+Run from sandali_bot/:
+
+    python -m benchmarks.generate --db /tmp/bench.db --users 200 --expenses 200000 --investments 5000
+    python -m benchmarks.run --db /tmp/bench.db --output report.json
+    python -m benchmarks.run --db /tmp/bench.db --baseline baseline.json
+
+The bot's modules live in app/ and import each other as top-level
+modules, so app/ is put on sys.path here.
+"""
+import os
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
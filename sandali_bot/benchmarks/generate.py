@@ -0,0 +1,144 @@
+"""
+Fills a database with synthetic users, expenses and investments.
+
+    python -m benchmarks.generate --db /tmp/bench.db --users 200 --expenses 200000 --investments 5000
+
+The same --seed always produces the same data. Activity is heavy-tailed
+(a few users own most expenses), categories and amounts follow typical
+household spending, and times cluster around meals and evenings with more
+entertainment at weekends.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from benchmarks import APP_DIR
+from db.database import Database
+from utils.api_clients import ASSET_CLASSES
+
+# category: (share of expenses, median amount, spread)
+CATEGORIES = {
+    "Food": (0.34, 12, 0.6),
+    "Transport": (0.20, 8, 0.7),
+    "Entertainment": (0.09, 25, 0.8),
+    "Utilities": (0.07, 60, 0.4),
+    "Other": (0.12, 20, 1.0),
+    "Shopping": (0.12, 40, 0.9),
+    "Health": (0.06, 30, 0.8),
+}
+CUSTOM_CATEGORIES = ["Coffee", "Books", "Gym", "Pets", "Travel", "Gifts"]
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 8, 10, 6, 5, 6, 10, 9, 5, 5, 6, 8, 10, 10, 8, 5, 3, 2]
+TIMEZONES = ["UTC", "Europe/London", "Europe/Berlin", "Asia/Tashkent", "America/New_York", "Asia/Tokyo"]
+DESCRIPTIONS = ["lunch", "groceries", "taxi", "cinema", "electricity", "pharmacy", "gift", "subscription"]
+# Investors buy stocks and crypto far more often than commodities
+CLASS_WEIGHTS = {"stock": 5, "crypto": 4, "metal": 1, "commodity": 0.5}
+DEFAULT_END = "2025-06-01T00:00:00+00:00"
+
+
+def load_base_prices():
+    with open(os.path.join(APP_DIR, "..", "tools", "fake_prices.json")) as f:
+        return json.load(f)
+
+
+def spread(rng, total, weights):
+    # Split total into integer shares proportional to weights
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for i in rng.sample(range(len(counts)), total - sum(counts)):
+        counts[i] += 1
+    return counts
+
+
+def random_time(rng, start, days, tz):
+    day = start + timedelta(days=rng.randrange(days))
+    hour = rng.choices(range(24), HOUR_WEIGHTS)[0]
+    local = datetime(day.year, day.month, day.day, hour, rng.randrange(60), rng.randrange(60), tzinfo=tz)
+    return local
+
+
+def expense_rows(rng, count, custom, start, days, tz):
+    names = list(CATEGORIES) + custom
+    weekday_weights = [CATEGORIES[name][0] for name in CATEGORIES] + [0.03] * len(custom)
+    weekend_weights = [weight * (2 if name == "Entertainment" else 1) for name, weight in zip(names, weekday_weights)]
+    rows = []
+    for _ in range(count):
+        date = random_time(rng, start, days, tz)
+        category = rng.choices(names, weekend_weights if date.weekday() >= 5 else weekday_weights)[0]
+        median, sigma = CATEGORIES.get(category, (0, 15, 0.8))[1:]
+        amount = round(rng.lognormvariate(math.log(median), sigma), 2)
+        description = rng.choice(DESCRIPTIONS) if rng.random() < 0.3 else None
+        rows.append((category, amount, description, date.isoformat(), int(date.timestamp())))
+    return rows
+
+
+async def generate(path, users=200, expenses=200000, investments=5000, days=365, seed=42, end=DEFAULT_END):
+    rng = random.Random(seed)
+    end = datetime.fromisoformat(end)
+    start = end - timedelta(days=days)
+    prices = load_base_prices()
+    assets = list(ASSET_CLASSES)
+    asset_weights = [CLASS_WEIGHTS[ASSET_CLASSES[asset]] for asset in assets]
+
+    # Write-behind groups the concurrent investment inserts into few transactions
+    db = Database(db_name=path, write_behind=True)
+    await db.connect()
+    try:
+        user_ids = [100000 + i for i in range(users)]
+        activity = [rng.paretovariate(1.2) for _ in user_ids]
+        expense_counts = spread(rng, expenses, activity)
+        investor_ids = rng.sample(user_ids, max(1, int(users * 0.4)))
+        investment_counts = spread(rng, investments, [activity[user_ids.index(u)] for u in investor_ids])
+
+        for user_id, count in zip(user_ids, expense_counts):
+            tz_name = rng.choice(TIMEZONES)
+            await db.add_user(user_id, f"+1555{user_id}", f"user{user_id}", "Bench", str(user_id))
+            await db.set_timezone(user_id, tz_name)
+            custom = rng.sample(CUSTOM_CATEGORIES, rng.choice([0, 0, 0, 1, 2, 3]))
+            for name in custom:
+                await db.add_category(user_id, name)
+            rows = expense_rows(rng, count, custom, start, days, ZoneInfo(tz_name))
+            for i in range(0, len(rows), 5000):
+                await db.add_expenses(user_id, rows[i:i + 5000])
+
+        purchases = []
+        for user_id, count in zip(investor_ids, investment_counts):
+            # Most investors keep coming back to a handful of assets
+            favourites = rng.choices(assets, asset_weights, k=rng.randint(1, 6))
+            for _ in range(count):
+                asset = rng.choice(favourites)
+                price = prices[asset] * rng.uniform(0.6, 1.3)
+                quantity = round(rng.uniform(50, 5000) / price, 6)
+                date = random_time(rng, start, days, timezone.utc)
+                purchases.append(db.add_investment(user_id, asset, quantity, round(price, 6), date.isoformat()))
+        for i in range(0, len(purchases), 500):
+            await asyncio.gather(*purchases[i:i + 500])
+    finally:
+        await db.close()
+    return {"users": users, "expenses": expenses, "investments": investments, "days": days, "seed": seed, "end": end.isoformat()}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", required=True, help="database file to create (must not exist)")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--expenses", type=int, default=200000)
+    parser.add_argument("--investments", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=365, help="history length ending at --end")
+    parser.add_argument("--end", default=DEFAULT_END)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    options = parse_args()
+    if os.path.exists(options.db):
+        raise SystemExit(f"{options.db} already exists; pick a new path so runs stay reproducible")
+    summary = asyncio.run(generate(
+        options.db, options.users, options.expenses, options.investments, options.days, options.seed, options.end
+    ))
+    print(json.dumps(summary))
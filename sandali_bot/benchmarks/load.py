@@ -0,0 +1,223 @@
+"""
+End-to-end load test: scripted user sessions are fed through the real
+Dispatcher, routers, middlewares, database and chart renderer, with
+replies going to tools/fake_telegram.py instead of Telegram.
+
+    python -m benchmarks.load --sessions 200 --concurrency 20 --output load.json
+
+Each session registers, adds a few expenses through the AddExpense flow,
+views its expenses, taps a stats period, buys an asset and opens the
+portfolio. Latency is measured per update from feed_update until the
+handler (including its Bot API calls) returns. The report gives
+throughput and p50/p95/p99 latency overall and per step.
+
+The fake API server is started on a free port unless --api-url is given.
+The run uses a fresh temporary database and the fake price provider;
+throttling is effectively disabled unless THROTTLE_RATE is set.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import defaultdict
+
+from benchmarks import APP_DIR
+
+BOT_ID = 123456
+BOT_TOKEN = f"{BOT_ID}:load-test"
+CATEGORIES = ["Food", "Transport", "Entertainment", "Utilities", "Other"]
+AMOUNTS = [1, 5, 10, 15, 20, 50, 100]
+PERIODS = ["day", "week", "month", "3months"]
+ASSETS = {"crypto": ["BTC", "ETH", "SOL"], "stocks": ["AAPL", "MSFT", "NVDA"], "commodities": ["GOLD", "SILVER"]}
+
+
+def configure_environment(db_path, api_url):
+    # Must run before any app module imports config
+    os.environ["DB_PATH"] = db_path
+    os.environ["BOT_API_URL"] = api_url
+    os.environ["BOT_TOKEN"] = BOT_TOKEN
+    os.environ.setdefault("PRICE_PROVIDER", "fake")
+    os.environ.setdefault("THROTTLE_RATE", "1000000")
+    os.environ.setdefault("THROTTLE_BURST", "1000000")
+
+
+class Session:
+    # Builds the raw updates one simulated user sends
+    def __init__(self, user_id, rng):
+        self.user_id = user_id
+        self.rng = rng
+        self.chat = {"id": user_id, "type": "private"}
+        self.sender = {"id": user_id, "is_bot": False, "first_name": f"Load{user_id}"}
+        self.message_id = 0
+
+    def message(self, **fields):
+        self.message_id += 1
+        return {"message_id": self.message_id, "date": int(time.time()), "chat": self.chat, "from": self.sender, **fields}
+
+    def text(self, text):
+        return {"message": self.message(text=text)}
+
+    def callback(self, data):
+        bot_message = {
+            "message_id": self.message_id, "date": int(time.time()), "chat": self.chat,
+            "from": {"id": BOT_ID, "is_bot": True, "first_name": "Sandali"}, "text": "...",
+        }
+        return {"callback_query": {
+            "id": f"{self.user_id}-{self.message_id}", "from": self.sender, "chat_instance": str(self.user_id),
+            "message": bot_message, "data": data,
+        }}
+
+    def script(self, expenses):
+        rng = self.rng
+        yield "start", self.text("/start")
+        yield "register", {"message": self.message(contact={
+            "phone_number": f"+1555{self.user_id}", "first_name": self.sender["first_name"], "user_id": self.user_id,
+        })}
+        for _ in range(expenses):
+            yield "expense.open", self.text("➕ Add Expense")
+            yield "expense.category", self.callback(f"category:{rng.choice(CATEGORIES)}")
+            yield "expense.amount", self.callback(f"amount:{rng.choice(AMOUNTS)}")
+            yield "expense.description", self.text(rng.choice(["lunch", "taxi", "skip"]))
+        yield "expenses.view", self.text("📋 View Expenses")
+        yield "stats", self.callback(f"stats_period:{rng.choice(PERIODS)}")
+        category = rng.choice(list(ASSETS))
+        yield "invest.open", self.text("💰 Investments")
+        yield "invest.category", self.callback(f"inv_cat:{category}")
+        yield "invest.asset", self.callback(f"inv_asset:{rng.choice(ASSETS[category])}")
+        yield "invest.quantity", self.text(str(rng.randint(1, 10)))
+        yield "invest.price", self.text(str(rng.randint(10, 1000)))
+        yield "portfolio", self.text("💼 View Portfolio")
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+
+    def rank(p):
+        return round(samples[min(len(samples) - 1, int(len(samples) * p))] * 1000, 3)
+    return {"count": len(samples), "p50_ms": rank(0.50), "p95_ms": rank(0.95), "p99_ms": rank(0.99), "max_ms": rank(1.0)}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_api(latency):
+    port = free_port()
+    script = os.path.join(APP_DIR, "..", "tools", "fake_telegram.py")
+    process = subprocess.Popen([sys.executable, script, "--port", str(port), "--latency", str(latency)])
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise SystemExit("fake Telegram API did not start")
+
+
+async def run_load(options, api_url):
+    from aiogram.types import Update
+    from main import create_bot, create_dispatcher, start_services, stop_services
+
+    bot = create_bot()
+    dp = create_dispatcher()
+    price_refresher = await start_services()
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    update_ids = iter(range(1, 10 ** 9))
+    queue = asyncio.Queue()
+    for i in range(options.sessions):
+        queue.put_nowait(i)
+
+    async def worker():
+        while not queue.empty():
+            index = queue.get_nowait()
+            session = Session(1_000_000 + index, random.Random(options.seed + index))
+            for label, payload in session.script(options.expenses):
+                update = Update.model_validate({"update_id": next(update_ids), **payload}, context={"bot": bot})
+                started = time.perf_counter()
+                try:
+                    await dp.feed_update(bot, update)
+                except Exception as e:
+                    errors[f"{label}: {type(e).__name__}: {e}"] += 1
+                latencies[label].append(time.perf_counter() - started)
+                if options.think:
+                    await asyncio.sleep(session.rng.uniform(0, 2 * options.think))
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker() for _ in range(options.concurrency)))
+    finally:
+        duration = time.perf_counter() - started
+        await bot.session.close()
+        await stop_services(price_refresher)
+
+    everything = [sample for samples in latencies.values() for sample in samples]
+    return {
+        "duration_s": round(duration, 3),
+        "updates": len(everything),
+        "throughput_updates_per_s": round(len(everything) / duration, 1),
+        "errors": dict(errors),
+        "latency": {"all": percentiles(everything), **{label: percentiles(samples) for label, samples in latencies.items()}},
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100, help="simulated users in total")
+    parser.add_argument("--concurrency", type=int, default=10, help="sessions running at once")
+    parser.add_argument("--expenses", type=int, default=3, help="expenses each session adds")
+    parser.add_argument("--think", type=float, default=0.0, help="mean seconds a user waits between steps")
+    parser.add_argument("--api-url", help="Bot API server to use instead of starting tools/fake_telegram.py")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="latency of the started fake API, seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    process = None
+    api_url = options.api_url
+    if api_url is None:
+        process, api_url = start_fake_api(options.api_latency)
+    workdir = tempfile.mkdtemp(prefix="sandali-load-")
+    configure_environment(os.path.join(workdir, "load.db"), api_url)
+    try:
+        results = asyncio.run(run_load(options, api_url))
+        # Bot API calls made, by method, as counted by the fake server
+        with urllib.request.urlopen(f"{api_url}/stats", timeout=5) as response:
+            results["api_calls"] = json.load(response)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    report = {
+        "meta": {
+            "sessions": options.sessions, "concurrency": options.concurrency, "expenses": options.expenses,
+            "think": options.think, "api_latency": options.api_latency, "seed": options.seed, "db": workdir,
+        },
+        **results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if options.output:
+        with open(options.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 1 if results["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Times database queries and chart rendering against a generated database
+and writes a JSON report.
+
+    python -m benchmarks.run --db /tmp/bench.db --output report.json
+    python -m benchmarks.run --db /tmp/bench.db --baseline baseline.json --threshold 0.2
+
+With --baseline, each scenario's median is compared to the baseline's.
+Scenarios slower by more than --threshold (a fraction) are listed and the
+exit status is 1.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from benchmarks import APP_DIR
+from benchmarks.generate import load_base_prices
+from db.database import Database
+from utils.charts import generate_bar_chart, generate_pie_chart
+
+PERIODS = {"day": 1, "week": 7, "month": 30, "3months": 90}
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "runs": len(samples),
+        "min_ms": round(samples[0] * 1000, 3),
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 3),
+    }
+
+
+async def timed(func, repeat, warmup=1):
+    for _ in range(warmup):
+        await func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def period_bounds(now, tz_name, days):
+    # Same boundaries as handlers/stats.py: local midnight days - 1 days ago until now
+    end = now.astimezone(ZoneInfo(tz_name))
+    start = end.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days - 1)
+    return int(start.timestamp()), int(end.timestamp())
+
+
+def portfolio_value(positions, prices):
+    # The aggregation view_portfolio does once prices are known
+    total_value = total_cost = 0
+    for asset, total_quantity, cost in positions:
+        total_cost += cost
+        total_value += total_quantity * prices.get(asset, 0)
+    return total_value, total_cost
+
+
+async def pick_users(db):
+    # The heaviest user is the worst case; the median user the typical one
+    rows = await db._fetchall('''
+        SELECT user_id, COUNT(*) AS n FROM expenses GROUP BY user_id ORDER BY n DESC
+    ''')
+    investors = await db._fetchall('''
+        SELECT user_id, COUNT(*) AS n FROM investments GROUP BY user_id ORDER BY n DESC
+    ''')
+    users = {"heavy": rows[0][0], "median": rows[len(rows) // 2][0]}
+    if investors:
+        users["heavy_investor"] = investors[0][0]
+    return users
+
+
+async def run_scenarios(path, repeat, chart_repeat):
+    db = Database(db_name=path)
+    await db.connect()
+    results = {}
+    try:
+        users = await pick_users(db)
+        now = datetime.fromtimestamp((await db._fetchone('SELECT MAX(ts) FROM expenses'))[0]).astimezone()
+        prices = load_base_prices()
+
+        for label in ("heavy", "median"):
+            user_id = users[label]
+            tz_name = (await db.get_user(user_id))[5]
+
+            results[f"get_expenses.first_page.{label}"] = await timed(
+                lambda: db.get_expenses(user_id, limit=11), repeat)
+            # Seek position half-way through the user's history
+            middle = await db._fetchone('''
+                SELECT ts, id FROM expenses WHERE user_id = ?
+                ORDER BY ts DESC, id DESC LIMIT 1 OFFSET (SELECT COUNT(*) / 2 FROM expenses WHERE user_id = ?)
+            ''', (user_id, user_id))
+            before = tuple(middle)
+            results[f"get_expenses.deep_page.{label}"] = await timed(
+                lambda: db.get_expenses(user_id, limit=11, before=before), repeat)
+
+            for period, days in PERIODS.items():
+                start_ts, end_ts = period_bounds(now, tz_name, days)
+                results[f"get_spending_stats.{period}.{label}"] = await timed(
+                    lambda: db.get_spending_stats(user_id, start_ts, end_ts), repeat)
+
+        if "heavy_investor" in users:
+            user_id = users["heavy_investor"]
+            results["get_investments.heavy_investor"] = await timed(
+                lambda: db.get_investments(user_id), repeat)
+
+            async def portfolio():
+                return portfolio_value(await db.get_positions(user_id), prices)
+            results["portfolio.heavy_investor"] = await timed(portfolio, repeat)
+
+        start_ts, end_ts = period_bounds(now, "UTC", PERIODS["3months"])
+        stats = await db.get_spending_stats(users["heavy"], start_ts, end_ts)
+    finally:
+        await db.close()
+
+    async def bar():
+        generate_bar_chart(stats, "Last 3 Months Spending")
+
+    async def pie():
+        generate_pie_chart(stats, "Last 3 Months Spending")
+    results["chart.bar"] = await timed(bar, chart_repeat)
+    results["chart.pie"] = await timed(pie, chart_repeat)
+    return users, results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, threshold):
+    # Returns [(scenario, baseline ms, current ms, change)] for regressions
+    regressions = []
+    for name, result in report["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or not before["median_ms"]:
+            continue
+        change = result["median_ms"] / before["median_ms"] - 1
+        result["baseline_median_ms"] = before["median_ms"]
+        result["change"] = round(change, 3)
+        if change > threshold:
+            regressions.append((name, before["median_ms"], result["median_ms"], change))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", required=True, help="database made by benchmarks.generate")
+    parser.add_argument("--repeat", type=int, default=50, help="timed runs per query scenario")
+    parser.add_argument("--chart-repeat", type=int, default=5, help="timed runs per chart scenario")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before failing")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    users, results = asyncio.run(run_scenarios(options.db, options.repeat, options.chart_repeat))
+    report = {
+        "meta": {
+            "created_at": datetime.now().astimezone().isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "db": options.db,
+            "users": users,
+        },
+        "results": results,
+    }
+
+    regressions = []
+    if options.baseline:
+        with open(options.baseline) as f:
+            regressions = compare(report, json.load(f), options.threshold)
+        report["meta"]["baseline"] = options.baseline
+
+    text = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    for name, before, after, change in regressions:
+        print(f"REGRESSION {name}: {before:.3f} ms -> {after:.3f} ms ({change:+.0%})", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from db.database import Database, encode_cursor, decode_cursor
+
+
+@pytest.mark.parametrize("ts, expense_id", [
+    (0, 1),
+    (1_700_000_000, 123456),
+    (-5, 3),
+    (-14212800, 7),
+])
+def test_cursor_round_trip(ts, expense_id):
+    assert decode_cursor(encode_cursor(ts, expense_id)) == (ts, expense_id)
+
+
+@pytest.mark.parametrize("cursor", [None, "", "abc", "1.2.3", "x!.1"])
+def test_malformed_cursor(cursor):
+    assert decode_cursor(cursor) is None
+
+
+def test_write_behind_survives_a_failed_flush(tmp_path):
+    async def scenario():
+        database = Database(str(tmp_path / "test.db"), read_connections=1, write_behind=True)
+        await database.connect()
+        try:
+            real_flush = database._flush
+
+            async def broken_flush(batch):
+                raise sqlite3.OperationalError("disk I/O error")
+            database._flush = broken_flush
+            with pytest.raises(sqlite3.OperationalError):
+                await asyncio.wait_for(database.add_user(1, "+1", "u", "U", None), 5)
+
+            database._flush = real_flush
+            await asyncio.wait_for(database.add_user(1, "+1", "u", "U", None), 5)
+            assert await database.get_user(1) is not None
+        finally:
+            await database.close()
+
+    asyncio.run(scenario())
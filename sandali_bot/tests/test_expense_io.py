@@ -0,0 +1,45 @@
+import csv
+import io
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils.expense_io import iter_records, parse_record, RowError
+
+
+def record(date):
+    return {"date": date, "category": "Food", "amount": "12.5", "description": "lunch"}
+
+
+def test_parse_record():
+    category, amount, description, _, ts = parse_record(record("2024-03-01T10:00:00Z"), timezone.utc)
+    assert (category, amount, description) == ("Food", 12.5, "lunch")
+    assert ts == int(datetime(2024, 3, 1, 10, tzinfo=timezone.utc).timestamp())
+
+
+@pytest.mark.parametrize("date", [
+    "1969-07-20",
+    "1999-12-31T23:59:59Z",
+    (datetime.now(timezone.utc) + timedelta(days=2)).isoformat(),
+])
+def test_dates_out_of_range(date):
+    with pytest.raises(RowError, match="out of range"):
+        parse_record(record(date), timezone.utc)
+
+
+def test_description_too_long():
+    row = record("2024-03-01")
+    row["description"] = "x" * 501
+    with pytest.raises(RowError, match="description"):
+        parse_record(row, timezone.utc)
+
+
+def test_oversized_csv_field_is_a_row_error():
+    f = io.StringIO(
+        "date,category,amount,description\n"
+        f"2024-03-01,Food,1,\"{'x' * (csv.field_size_limit() + 1)}\"\n"
+        "2024-03-02,Food,2,ok\n"
+    )
+    records = [record for _, record in iter_records(f, "csv")]
+    assert isinstance(records[0], RowError)
+    assert records[-1]["amount"] == "2"
@@ -0,0 +1,49 @@
+import time
+
+from utils.api_clients import PriceProvider
+from utils.price_refresher import is_due, quota_interval
+from utils.prices import PRICE_CACHE, NEGATIVE_CACHE
+from utils.rate_limit import TokenBucket, QuotaLimiter
+
+
+class PerSymbolProvider(PriceProvider):
+    # 5 requests a minute, 24 a day, one request per symbol
+    def __init__(self):
+        super().__init__()
+        self.limiter = QuotaLimiter(TokenBucket(5, 60), TokenBucket(24, 24 * 60 * 60))
+
+    def request_cost(self, symbols):
+        return len(symbols)
+
+
+def test_negative_cached_asset_is_not_due():
+    now = time.time()
+    PRICE_CACHE.pop("AAPL", None)
+    NEGATIVE_CACHE["AAPL"] = now + 60
+    try:
+        assert not is_due("AAPL", now)
+        assert is_due("AAPL", now + 61)
+    finally:
+        NEGATIVE_CACHE.pop("AAPL", None)
+
+
+def test_quota_interval_follows_daily_budget():
+    provider = PerSymbolProvider()
+    # Half of 24/day for 4 assets: each can be refreshed every 8 hours
+    assert quota_interval(provider, ["AAPL", "MSFT", "NVDA", "TSLA"]) == 8 * 60 * 60
+
+    now = time.time()
+    PRICE_CACHE["AAPL"] = (100.0, now - 4 * 60 * 60)
+    try:
+        assert is_due("AAPL", now)
+        assert not is_due("AAPL", now, quota_interval(provider, ["AAPL", "MSFT", "NVDA", "TSLA"]))
+    finally:
+        PRICE_CACHE.pop("AAPL", None)
+
+
+def test_refresher_leaves_reserve_for_users():
+    provider = PerSymbolProvider()
+    symbols = ["AAPL", "MSFT", "NVDA", "TSLA", "META"]
+    assert provider.affordable(symbols) == symbols
+    # Half of the 5-per-minute bucket is kept back
+    assert provider.affordable(symbols, reserve=0.5) == symbols[:2]
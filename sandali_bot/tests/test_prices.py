@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+from utils import api_clients, prices
+from utils.api_clients import CoinGeckoProvider, PriceProvider
+from utils.circuit_breaker import CircuitBreaker, CLOSED, HALF_OPEN
+from utils.rate_limit import TokenBucket, QuotaLimiter
+
+
+class StubProvider(PriceProvider):
+    name = "stub"
+
+    def __init__(self):
+        super().__init__()
+        self.limiter = QuotaLimiter(TokenBucket(1, 24 * 60 * 60))
+        self.calls = 0
+
+    async def get_prices(self, symbols):
+        self.calls += 1
+        return {symbol: 1.0 for symbol in symbols}
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker.opened_at = time.monotonic() - breaker.reset_timeout  # Reset timeout already passed
+
+
+def test_quota_exhausted_does_not_strand_half_open_probe(monkeypatch):
+    saved = []
+
+    async def save_prices(rows):
+        saved.extend(rows)
+    monkeypatch.setattr(prices.db, "save_prices", save_prices)
+    monkeypatch.setattr(prices, "PRICE_CACHE", {})
+    provider = StubProvider()
+    open_breaker(provider.breaker)
+    provider.limiter.try_acquire()  # Spend the whole quota
+
+    assert asyncio.run(prices._fetch_batch(provider, ["AAPL"])) == {}
+    assert provider.calls == 0
+
+    # Quota back: the probe must still be available and close the breaker
+    provider.limiter.buckets[0].tokens = 1
+    assert asyncio.run(prices._fetch_batch(provider, ["AAPL"])) == {"AAPL": 1.0}
+    assert provider.calls == 1
+    assert provider.breaker.state == CLOSED
+    assert [row[:2] for row in saved] == [("AAPL", 1.0)]
+
+
+def test_stale_probe_expires():
+    breaker = CircuitBreaker("stub", failure_threshold=1, reset_timeout=10)
+    open_breaker(breaker)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    breaker._probe_started -= breaker.reset_timeout
+    assert breaker.allow()
+
+
+class StubResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class StubClient:
+    def __init__(self, data):
+        self.data = data
+
+    async def get(self, url, **kwargs):
+        return StubResponse(self.data)
+
+
+def test_coingecko_skips_null_prices(monkeypatch):
+    data = {"bitcoin": {"usd": 65000}, "ethereum": {"usd": None}, "solana": None}
+    monkeypatch.setattr(api_clients, "get_http_client", lambda: StubClient(data))
+    result = asyncio.run(CoinGeckoProvider().get_prices(["BTC", "ETH", "SOL", "DOGE"]))
+    assert result == {"BTC": 65000.0}
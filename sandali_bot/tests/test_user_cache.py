@@ -0,0 +1,34 @@
+import asyncio
+
+from utils import user_cache as user_cache_module
+from utils.user_cache import UserCache
+
+ROW = (1, "+1", "user", "User", None, "UTC")
+
+
+def test_unknown_users_expire_quickly(monkeypatch):
+    rows = {}
+    lookups = []
+
+    async def get_user(user_id):
+        lookups.append(user_id)
+        return rows.get(user_id)
+    monkeypatch.setattr(user_cache_module.db, "get_user", get_user)
+    now = [1000.0]
+    monkeypatch.setattr(user_cache_module.time, "monotonic", lambda: now[0])
+    cache = UserCache(ttl=600, negative_ttl=5)
+
+    async def scenario():
+        assert await cache.get(1) is None
+        assert await cache.get(1) is None
+        assert lookups == [1]
+
+        rows[1] = ROW  # Registered through another replica
+        now[0] += 6
+        assert (await cache.get(1))["phone"] == "+1"
+
+        now[0] += 300
+        assert (await cache.get(1))["phone"] == "+1"
+        assert lookups == [1, 1]
+
+    asyncio.run(scenario())
@@ -0,0 +1,105 @@
+"""
+Local stand-in for the Alpha Vantage quote API, so price lookups can be
+exercised offline.
+
+    python tools/fake_alpha_vantage.py --port 8081 --latency 0.2
+    ALPHA_VANTAGE_URL=http://127.0.0.1:8081/query python main.py
+
+Supports GLOBAL_QUOTE, CURRENCY_EXCHANGE_RATE and COMMODITY with the same
+response shapes the bot parses, plus CoinGecko's simple/price
+(COINGECKO_URL=http://127.0.0.1:8081/api/v3/simple/price).
+Prices drift a little on every request.
+"""
+import argparse
+import asyncio
+import random
+
+from aiohttp import web
+
+BASE_PRICES = {
+    # Stocks
+    "AAPL": 190.0, "MSFT": 410.0, "AMZN": 180.0, "GOOGL": 165.0, "META": 480.0,
+    "TSLA": 175.0, "NVDA": 900.0, "JPM": 195.0, "WMT": 60.0, "V": 275.0,
+    # Cryptocurrencies
+    "BTC": 65000.0, "ETH": 3200.0, "BNB": 580.0, "XRP": 0.52, "ADA": 0.45,
+    "SOL": 150.0, "DOGE": 0.15, "DOT": 7.0, "AVAX": 35.0, "SHIB": 0.000024,
+    # Commodities
+    "GOLD": 2300.0, "SILVER": 27.0, "WTI": 80.0, "NATURAL_GAS": 2.2, "COPPER": 9800.0,
+}
+
+
+def price_for(symbol):
+    base = BASE_PRICES.get(symbol)
+    if base is None:
+        return None
+    return base * random.uniform(0.98, 1.02)
+
+
+async def query(request):
+    options = request.app["options"]
+    if options.latency:
+        await asyncio.sleep(options.latency)
+    if random.random() < options.rate_limit:
+        return web.json_response({"Note": "Thank you for using Alpha Vantage! (simulated rate limit)"})
+
+    function = request.query.get("function")
+    symbol = request.query.get("symbol")
+    price = price_for(symbol)
+    if price is None:
+        return web.json_response({"Error Message": f"Invalid API call for symbol {symbol}"})
+
+    if function == "GLOBAL_QUOTE":
+        return web.json_response({"Global Quote": {"01. symbol": symbol, "05. price": f"{price:.4f}"}})
+    if function == "CURRENCY_EXCHANGE_RATE":
+        return web.json_response({"Realtime Currency Exchange Rate": {
+            "1. From_Currency Code": symbol,
+            "3. To_Currency Code": request.query.get("to_currency", "USD"),
+            "5. Exchange Rate": f"{price:.8f}",
+        }})
+    if function == "COMMODITY":
+        return web.json_response({"name": symbol, "data": [{"date": "latest", "value": f"{price:.2f}"}]})
+    return web.json_response({"Error Message": f"Unsupported function {function}"})
+
+
+COINGECKO_IDS = {
+    "bitcoin": "BTC", "ethereum": "ETH", "binancecoin": "BNB", "ripple": "XRP",
+    "cardano": "ADA", "solana": "SOL", "dogecoin": "DOGE", "polkadot": "DOT",
+    "avalanche-2": "AVAX", "shiba-inu": "SHIB",
+}
+
+
+async def simple_price(request):
+    options = request.app["options"]
+    if options.latency:
+        await asyncio.sleep(options.latency)
+    if random.random() < options.rate_limit:
+        return web.json_response({"status": {"error_code": 429, "error_message": "simulated rate limit"}}, status=429)
+
+    prices = {}
+    for coin_id in request.query.get("ids", "").split(","):
+        price = price_for(COINGECKO_IDS.get(coin_id))
+        if price is not None:
+            prices[coin_id] = {"usd": price}
+    return web.json_response(prices)
+
+
+def make_app(options):
+    app = web.Application()
+    app["options"] = options
+    app.router.add_get("/query", query)
+    app.router.add_get("/api/v3/simple/price", simple_price)
+    return app
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before answering")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="fraction of requests answered with a 'Note'")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    options = parse_args()
+    web.run_app(make_app(options), host=options.host, port=options.port)
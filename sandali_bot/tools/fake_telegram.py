@@ -0,0 +1,113 @@
+"""
+Local stand-in for the Telegram Bot API, so the bot can be load-tested
+without talking to Telegram.
+
+    python tools/fake_telegram.py --port 8090 --latency 0.02
+    BOT_API_URL=http://127.0.0.1:8090 python main.py
+
+Answers getMe, sendMessage, sendPhoto, sendDocument, editMessageText,
+answerCallbackQuery and the webhook calls with the shapes aiogram
+expects. GET /stats returns how many times each method was called.
+"""
+import argparse
+import asyncio
+import itertools
+import time
+from collections import Counter
+
+from aiohttp import web
+
+_message_ids = itertools.count(1)
+
+
+def make_message(chat_id, message_id=None, **fields):
+    return {
+        "message_id": message_id or next(_message_ids),
+        "date": int(time.time()),
+        "chat": {"id": int(chat_id), "type": "private"},
+        **fields,
+    }
+
+
+def get_me(bot_id, params):
+    return {"id": bot_id, "is_bot": True, "first_name": "Sandali", "username": "sandali_fake_bot"}
+
+
+def send_message(bot_id, params):
+    return make_message(params["chat_id"], text=params.get("text", ""))
+
+
+def send_photo(bot_id, params):
+    message_id = next(_message_ids)
+    photo = [{"file_id": f"photo-{message_id}", "file_unique_id": f"p{message_id}", "width": 1280, "height": 768}]
+    return make_message(params["chat_id"], message_id, photo=photo, caption=params.get("caption"))
+
+
+def send_document(bot_id, params):
+    message_id = next(_message_ids)
+    document = {"file_id": f"doc-{message_id}", "file_unique_id": f"d{message_id}", "file_name": "file"}
+    return make_message(params["chat_id"], message_id, document=document, caption=params.get("caption"))
+
+
+def edit_message_text(bot_id, params):
+    return make_message(params["chat_id"], int(params["message_id"]), text=params.get("text", ""))
+
+
+def answer_true(bot_id, params):
+    return True
+
+
+METHODS = {
+    "getme": get_me,
+    "sendmessage": send_message,
+    "sendphoto": send_photo,
+    "senddocument": send_document,
+    "editmessagetext": edit_message_text,
+    "answercallbackquery": answer_true,
+    "deletewebhook": answer_true,
+    "setwebhook": answer_true,
+}
+
+
+async def api_method(request):
+    options = request.app["options"]
+    method = request.match_info["method"].lower()
+    request.app["calls"][method] += 1
+    if options.latency:
+        await asyncio.sleep(options.latency)
+
+    handler = METHODS.get(method)
+    if handler is None:
+        return web.json_response({"ok": False, "error_code": 404, "description": "Not Found: method not found"}, status=404)
+    # aiogram posts form fields (multipart when uploading files); file parts are read and dropped
+    params = {}
+    for key, value in (await request.post()).items():
+        params[key] = value if isinstance(value, str) else None
+    bot_id = int(request.match_info["token"].split(":")[0])
+    return web.json_response({"ok": True, "result": handler(bot_id, params)})
+
+
+async def stats(request):
+    return web.json_response(dict(request.app["calls"]))
+
+
+def make_app(options):
+    app = web.Application(client_max_size=50 * 1024 * 1024)
+    app["options"] = options
+    app["calls"] = Counter()
+    app.router.add_post("/bot{token}/{method}", api_method)
+    app.router.add_get("/stats", stats)
+    return app
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before answering")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    options = parse_args()
+    web.run_app(make_app(options), host=options.host, port=options.port, print=None)